@@ -0,0 +1,151 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Planner test', 'Bernitt'))
+
+import Solver
+from InstanceGenerator import InstanceGenerator
+from DataObj import DataObj
+from ALNS import ALNS
+from Profiler import Profiler
+
+
+class Benchmark:
+
+    def __init__(self, seeds=(0, 1, 2), eval_seconds=0.5, profiler=None):
+        #Runs both planners on generated instances with fixed seeds, so runs of different versions can be compared.
+        #With a profiler the measured runs are profiled, which also slows them down
+        self.seeds = seeds
+        self.profiler = profiler
+        self.eval_seconds = eval_seconds   #How long the evaluations per second are measured
+        self.results = []
+
+    def rate(self, fn):
+        #Calls of fn per second over eval_seconds
+        calls = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < self.eval_seconds:
+            fn()
+            calls += 1
+        return calls / (time.perf_counter() - start)
+
+    def peak_memory(self, fn):
+        #Peak memory in MB allocated by python while running fn
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak / 2**20
+
+    def run_solver(self, seed, mode='constructive', **instance):
+        data_reader = InstanceGenerator(seed).meetings(**instance)
+        solver = Solver.Solver(self.profiler)
+
+        np.random.seed(seed)
+        start = time.perf_counter()
+        sol = solver.Solve(data_reader, mode=mode)
+        time_to_feasible = time.perf_counter() - start
+        feasible = sol is not None and solver.check_feasibility(sol, data_reader)
+
+        result = {'planner': 'Solver', 'mode': mode, 'seed': seed, 'instance': instance, 'meetings': data_reader.num_meetings,
+                  'feasible': bool(feasible), 'time_to_feasible': time_to_feasible}
+        if sol is not None:
+            #Full feasibility checks and incremental moves (move and undo) per second
+            result['checks_per_sec'] = self.rate(lambda: solver.check_feasibility(sol, data_reader))
+            state = solver.get_state(sol, data_reader)
+            rng = np.random.default_rng(seed)
+
+            def move():
+                state.move(int(rng.integers(state.problem.num_meetings)), int(rng.integers(1, solver.calendar.weeks+1)),
+                           int(rng.integers(1, solver.calendar.days+1)), int(rng.integers(solver.calendar.quarters)))
+                state.undo()
+            result['moves_per_sec'] = self.rate(move)
+
+        solver.problem = None
+        np.random.seed(seed)
+        result['peak_memory_mb'] = self.peak_memory(lambda: solver.Solve(data_reader, mode=mode))
+        return result
+
+    def run_alns(self, seed, run_length=10, **instance):
+        #The instance files are only needed while the run reads them
+        with tempfile.TemporaryDirectory(prefix='utt') as tmp:
+            folder = InstanceGenerator(seed).timetable(tmp, **instance)
+            data = DataObj(folder, profiler=self.profiler)
+
+            np.random.seed(seed)
+            start = time.perf_counter()
+            data.generate_initial_solution()
+            time_to_feasible = time.perf_counter() - start
+
+            rng = np.random.default_rng(seed)
+            lectures = data.lectures
+
+            def evaluation():
+                c_nr = int(lectures[rng.integers(len(lectures))])
+                entries = data.feasible_entries(c_nr)
+                if len(entries) > 0:
+                    data.delta_eval(entries[0], c_nr)
+            evals_per_sec = self.rate(evaluation)
+
+            np.random.seed(seed)
+            alns = ALNS(data)
+            best = alns.Run(run_length)
+
+            np.random.seed(seed)
+            peak = self.peak_memory(lambda: ALNS(DataObj(folder)).Run(min(run_length, 1)))
+
+        return {'planner': 'ALNS', 'seed': seed, 'instance': instance, 'lectures': len(lectures),
+                'time_to_feasible': time_to_feasible, 'evals_per_sec': evals_per_sec,
+                'iterations_per_sec': alns.iterations/run_length, 'best_objective': int(best),
+                'objective_over_time': [(t, int(obj)) for t, obj in alns.objective_history], 'peak_memory_mb': peak}
+
+    def run(self, solver_instances=(), alns_instances=(), run_length=10):
+        for instance in solver_instances:
+            for seed in self.seeds:
+                self.results.append(self.run_solver(seed, **instance))
+        for instance in alns_instances:
+            for seed in self.seeds:
+                self.results.append(self.run_alns(seed, run_length=run_length, **instance))
+        return self.results
+
+    def report(self):
+        for r in self.results:
+            if r['planner'] == 'Solver':
+                print(f"Solver {r['mode']:12s} seed {r['seed']} meetings {r['meetings']:6d} feasible {r['feasible']!s:5s} "
+                      f"time to feasible {r['time_to_feasible']:8.3f}s checks/s {r.get('checks_per_sec', 0):9.1f} "
+                      f"moves/s {r.get('moves_per_sec', 0):9.1f} peak {r['peak_memory_mb']:7.1f}MB")
+            else:
+                print(f"ALNS seed {r['seed']} lectures {r['lectures']:6d} time to feasible {r['time_to_feasible']:8.3f}s "
+                      f"evals/s {r['evals_per_sec']:9.1f} iterations/s {r['iterations_per_sec']:7.2f} "
+                      f"best {r['best_objective']} peak {r['peak_memory_mb']:7.1f}MB")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark Solver and DataObj/ALNS on generated instances')
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0, 1, 2])
+    parser.add_argument('--meetings', type=int, nargs='*', default=[100, 300], help='meeting instance sizes')
+    parser.add_argument('--persons', type=int, default=40)
+    parser.add_argument('--mode', default='constructive')
+    parser.add_argument('--courses', type=int, nargs='*', default=[50], help='course instance sizes')
+    parser.add_argument('--run-length', type=float, default=10, help='seconds per ALNS run')
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--profile', help='profile the runs and write the call counts, times and rejections to this file')
+    args = parser.parse_args()
+
+    benchmark = Benchmark(seeds=args.seeds, profiler=Profiler() if args.profile else None)
+    benchmark.run(solver_instances=[{'mode': args.mode, 'n_meetings': n, 'n_persons': args.persons} for n in args.meetings],
+                  alns_instances=[{'n_courses': n, 'n_rooms': max(4, n//6), 'n_curricula': max(2, n//3), 'n_lecturers': max(2, n//2)} for n in args.courses],
+                  run_length=args.run_length)
+    benchmark.report()
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(benchmark.results, f, indent=1, default=float)
+    if args.profile:
+        benchmark.profiler.summary()
+        benchmark.profiler.to_json(args.profile)
@@ -0,0 +1,75 @@
+import numpy as np
+from datetime import date
+
+
+class Calendar:
+
+    def __init__(self, start=None, weeks=None, days=5, day_start=8, day_end=18, holidays=()):
+        #Planning horizon of whole weeks from the Monday of the week of start. Without start the horizon is ISO week 1 of
+        #next year and on, and without weeks it covers the ISO weeks of that year (52 or 53). Otherwise weeks defaults to
+        #52 and may run over several years, e.g. Calendar(date.today(), 104) for a rolling two year window.
+        #days working days per week from Monday, and day_start to day_end (hours) on every working day.
+        #Holidays are dates where nothing can be planned
+        if start is None:
+            year = date.today().year+1
+            start = date.fromisocalendar(year, 1, 1)
+            weeks = date(year, 12, 28).isocalendar()[1] if weeks is None else weeks
+        start = np.datetime64(start, 'D')
+        self.start = start - (start.astype(int) - 4) % 7   #Day 0 of datetime64 is a Thursday
+        self.weeks = 52 if weeks is None else int(weeks)
+        self.days = int(days)
+        self.day_start = int(day_start)
+        self.day_end = int(day_end)
+        self.quarters = (self.day_end-self.day_start)*4
+        self.horizon = self.weeks*self.days*self.quarters   #Number of quarters we can plan in
+        self.holidays = tuple(sorted(set(np.datetime64(h, 'D') for h in holidays)))
+
+        #Working days of the horizon that are holidays, shape (weeks, days)
+        self.closed = np.zeros((self.weeks, self.days), dtype=bool)
+        for h in self.holidays:
+            week, day = divmod(int((h - self.start).astype(int)), 7)
+            if 0 <= week < self.weeks and day < self.days:
+                self.closed[week, day] = True
+
+    def key(self):
+        #Identifies the calendar, e.g. for the occupancy of a data reader. Only strings and integers, so it can be stored as json
+        return (str(self.start), self.weeks, self.days, self.day_start, self.day_end, ','.join(str(h) for h in self.holidays))
+
+    @classmethod
+    def from_key(cls, key):
+        start, weeks, days, day_start, day_end, holidays = key
+        return cls(start, weeks, days, day_start, day_end, holidays.split(',') if holidays else ())
+
+    def dates(self, week, day):
+        #Date of every (week, day), both 1-indexed like in the solution
+        return self.start + 7*(np.asarray(week, dtype=int)-1) + np.asarray(day, dtype=int)-1
+
+    def to_datetime(self, week, day, kvarter):
+        #Start time of every (week, day, kvarter) of a solution
+        minutes = 60*self.day_start + 15*np.asarray(kvarter, dtype=int)
+        return self.dates(week, day).astype('datetime64[m]') + minutes.astype('timedelta64[m]')
+
+    def index(self, week, day, kvarter):
+        #Absolute quarter index from the start of the horizon. week and day are 1-indexed like in the solution
+        return ((np.asarray(week, dtype=int)-1)*self.days + np.asarray(day, dtype=int)-1)*self.quarters + np.asarray(kvarter, dtype=int)
+
+    def busy_quarters(self, start, end):
+        #The quarters of the horizon covered by busy periods from start to end (arrays of datetimes), one entry per period
+        #and working day it touches, as (period, first quarter, end quarter) with the quarters as absolute indices.
+        #Periods running over several days or years are cut at the day ends, and anything outside the horizon is left out
+        start = np.asarray(start, dtype='datetime64[m]')
+        end = np.asarray(end, dtype='datetime64[m]')
+        first_day = np.maximum(start.astype('datetime64[D]'), self.start)
+        last_day = np.minimum(end.astype('datetime64[D]'), self.start + 7*self.weeks - 1)
+        n_days = np.maximum((last_day - first_day).astype(int) + 1, 0)
+
+        period = np.repeat(np.arange(len(start)), n_days)
+        day = first_day[period] + (np.arange(len(period)) - np.repeat(np.cumsum(n_days) - n_days, n_days))
+        week, weekday = np.divmod((day - self.start).astype(int), 7)
+        day_open = day.astype('datetime64[m]') + np.timedelta64(60*self.day_start, 'm')
+        first = np.clip(np.floor((start[period] - day_open).astype(float)/15), 0, self.quarters).astype(int)
+        last = np.clip(np.ceil((end[period] - day_open).astype(float)/15), 0, self.quarters).astype(int)
+
+        keep = (weekday < self.days) & (last > first)
+        offset = (week*self.days + weekday)*self.quarters
+        return period[keep], (offset + first)[keep], (offset + last)[keep]
@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+try:
+    from ortools.sat.python import cp_model
+except ImportError:
+    cp_model = None
+
+
+if cp_model is not None:
+    class SolutionCallback(cp_model.CpSolverSolutionCallback):
+
+        def __init__(self, exact, callback):
+            #Calls callback(plan, objective, seconds) for every improving plan CP-SAT finds, the search stops when it returns True
+            super().__init__()
+            self.exact = exact
+            self.callback = callback
+
+        def on_solution_callback(self):
+            start = np.array([self.Value(v) for v in self.exact.start], dtype=int)
+            if self.callback(self.exact.plan(start), self.ObjectiveValue()/100, self.WallTime()):
+                self.StopSearch()
+
+
+class ExactSolver:
+
+    def __init__(self, solver, data_reader, weights=None, preferred=(9, 16), profiler=None):
+        #CP-SAT model of the meeting plan for small and medium instances. Every meeting gets a start quarter counted
+        #from the start of week 1, limited to the starts where all its participants are available and the meeting ends
+        #before the day ends. No overlap per participant, and the meetings of a recurring series keep the series interval
+        if cp_model is None:
+            raise ImportError("The exact solver needs OR-Tools, install it with: pip install ortools")
+        self.solver = solver
+        self.data_reader = data_reader
+        self.problem = solver.get_problem(data_reader)
+        self.weights = {'late': 1.0, 'window': 1.0}   #Same meaning as in LocalSearch, load and spacing are not modelled
+        self.weights.update(weights or {})
+        self.preferred = preferred
+        self.profiler = profiler
+        if profiler is not None:
+            profiler.instrument(self, ['build', 'Solve'])
+        self.build()
+
+    def allowed_starts(self, i):
+        #Start quarters of each meeting in series i, pruned with the unavailability of its participants and the
+        #weeks where the whole series fits
+        p, s = self.problem, self.problem.series[i]
+        starts = p.series_starts(i)
+        _, weeks = self.solver.base_weeks(starts, s)
+        allowed = []
+        for k in range(len(s['rows'])):
+            weeks_k = np.unique(weeks[:, k])
+            w, d, q = np.nonzero(starts[weeks_k])
+            allowed.append((weeks_k[w]*p.days + d)*p.quarters + q)
+        return allowed
+
+    def build(self):
+        p = self.problem
+        model = cp_model.CpModel()
+        window = ((self.preferred[0]-p.day_start)*4, (self.preferred[1]-p.day_start)*4)
+        self.start = [None]*p.num_meetings
+        self.num_values = 0
+        person_intervals = [[] for _ in range(p.num_persons)]
+        weeks, outside = [], []
+
+        for index, s in enumerate(p.series):
+            first_week = None
+            for i, (m, allowed) in enumerate(zip(s['rows'], self.allowed_starts(index))):
+                start = model.NewIntVarFromDomain(cp_model.Domain.FromValues(allowed.tolist()), f'start_{m}')
+                self.num_values += len(allowed)
+                week = model.NewIntVar(0, p.weeks-1, f'week_{m}')
+                model.AddDivisionEquality(week, start, p.days*p.quarters)
+                if first_week is None:
+                    first_week = week
+                else:
+                    model.Add(week == first_week + i*s['interval'])
+                kvarter = model.NewIntVar(0, p.quarters-1, f'kvarter_{m}')
+                model.AddModuloEquality(kvarter, start, p.quarters)
+
+                interval = model.NewFixedSizeIntervalVar(start, s['length'], f'meeting_{m}')
+                for pers in s['persons']:
+                    person_intervals[pers].append(interval)
+                self.start[m] = start
+
+                #Soft costs: weeks into the year and quarters outside the preferred window
+                quarters_outside = model.NewIntVar(0, p.quarters, f'outside_{m}')
+                model.Add(quarters_outside >= window[0] - kvarter)
+                model.Add(quarters_outside >= kvarter + s['length'] - window[1])
+                weeks.append(week)
+                outside.append(quarters_outside)
+
+        for intervals in person_intervals:
+            if len(intervals) > 1:
+                model.AddNoOverlap(intervals)
+
+        #CP-SAT needs integer coefficients, so the weights are given in hundredths
+        model.Minimize(int(round(100*self.weights['late']))*sum(weeks) + int(round(100*self.weights['window']))*sum(outside))
+        self.model = model
+
+    def hint(self, solution):
+        #Warm start from a plan, e.g. a heuristic solution
+        p = self.problem
+        self.model.ClearHints()
+        starts = p.start_quarters(solution.Week.values, solution.Day.values, solution.Kvarter.values)
+        for start, value in zip(self.start, starts):
+            self.model.AddHint(start, int(value))
+
+    def Solve(self, time_limit=60, workers=8, callback=None):
+        #Best plan found within time_limit seconds, or None if no plan was found.
+        #callback(plan, objective, seconds) is called with every improving plan found on the way, see SolutionCallback
+        cp_solver = cp_model.CpSolver()
+        cp_solver.parameters.max_time_in_seconds = time_limit
+        cp_solver.parameters.num_workers = workers
+        self.cp_solver = cp_solver
+        status = cp_solver.Solve(self.model, SolutionCallback(self, callback) if callback is not None else None)
+        self.status = cp_solver.StatusName(status)
+        if self.profiler is not None:
+            self.profiler.record('ExactSolver.status', self.status)
+            self.profiler.record('ExactSolver.start values', self.num_values)
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            return None
+        if self.profiler is not None:
+            self.profiler.record('ExactSolver.objective', cp_solver.ObjectiveValue()/100)
+
+        return self.plan(np.array([cp_solver.Value(v) for v in self.start], dtype=int))
+
+    def stop(self):
+        #Stop a running Solve from another thread, Solve then returns the best plan found so far
+        self.cp_solver.StopSearch()
+
+    def plan(self, start):
+        p = self.problem
+        times = pd.DataFrame({'Week': start//(p.days*p.quarters) + 1,
+                              'Day': start//p.quarters % p.days + 1,
+                              'Kvarter': start % p.quarters})
+        return pd.concat([self.data_reader.m_data.reset_index(drop=True), times], axis=1)
@@ -0,0 +1,109 @@
+import datetime
+import os
+import numpy as np
+import pandas as pd
+import dataReader
+
+
+class InstanceGenerator:
+
+    def __init__(self, seed=0):
+        #Synthetic instances for both planners. The same seed and settings always give the same instance
+        self.rng = np.random.default_rng(seed)
+
+    def meeting_frames(self, n_meetings=100, n_persons=30, participants=(2, 5), unavailability=0.05, recurrence=0.3,
+                       max_repeats=6, durations=(15, 30, 45, 60, 90, 120), weeks_in_year=52, year=None, groups=1):
+        #Meeting, person and unavailability sheets in the same layout as the Excel input.
+        #unavailability is the share of each person's working time (Monday-Friday 8-18) that is blocked,
+        #recurrence the share of meetings that repeat between 2 and max_repeats times.
+        #With groups > 1 the persons are split into that many groups, like departments, and every meeting is within one group
+        rng = self.rng
+        year = datetime.datetime.now().year+1 if year is None else year
+        persons = [f'P{i:04d}' for i in range(n_persons)]
+
+        rows = []
+        person_meetings = {p: [] for p in persons}
+        group_of = np.arange(n_persons) % groups
+        for m in range(n_meetings):
+            members = np.flatnonzero(group_of == rng.integers(groups)) if groups > 1 else np.arange(n_persons)
+            size = int(rng.integers(participants[0], min(participants[1], len(members))+1))
+            parts = [persons[i] for i in rng.choice(members, size=size, replace=False)]
+            num_meetings, days_between = 1, np.nan
+            if rng.random() < recurrence:
+                days_between = int(rng.choice((7, 14, 21, 28, 30)))
+                num_meetings = int(rng.integers(2, max(2, min(max_repeats, weeks_in_year//(days_between//7)))+1))
+            rows.append({'ID': m+1, 'Name': f'Meeting {m+1}', 'duration': int(rng.choice(durations)),
+                         'participants': ', '.join(parts), 'num_meetings': num_meetings, 'days_between': days_between})
+            for p in parts:
+                person_meetings[p].append(str(m+1))
+        m_data = pd.DataFrame(rows)
+        p_data = pd.DataFrame({'Initialer': persons, 'Møder': [','.join(person_meetings[p]) for p in persons]})
+
+        #Unavailability as 1-4 hour blocks and some whole days until every person reaches the requested share
+        rows = []
+        working_hours = weeks_in_year*5*10
+        for p in persons:
+            blocked = 0
+            while blocked < unavailability*working_hours:
+                day = datetime.date.fromisocalendar(year, int(rng.integers(1, weeks_in_year+1)), int(rng.integers(1, 6)))
+                if rng.random() < 0.1:
+                    start, end = datetime.time(8), datetime.time(18)
+                    blocked += 10
+                else:
+                    hours = int(rng.integers(1, 5))
+                    start_hour = int(rng.integers(8, 18-hours+1))
+                    start, end = datetime.time(start_hour), datetime.time(start_hour+hours)
+                    blocked += hours
+                rows.append({'Initialer': p, 'Start dato': pd.Timestamp(day), 'Start tid': start, 'End dato': pd.Timestamp(day), 'End tid': end})
+        u_data = pd.DataFrame(rows, columns=['Initialer', 'Start dato', 'Start tid', 'End dato', 'End tid'])
+        return m_data, p_data, u_data
+
+    def meetings(self, **settings):
+        #A dataReader loaded with a generated instance, see meeting_frames for the settings
+        data_reader = dataReader.dataReader()
+        data_reader.load_frames(*self.meeting_frames(**settings))
+        return data_reader
+
+    def write_meetings(self, folder, **settings):
+        #Write a generated instance as the three Excel files read by dataReader.read_data and return their names
+        os.makedirs(folder, exist_ok=True)
+        filenames = [os.path.join(folder, name) for name in ('møder.xlsx', 'personer.xlsx', 'Unavailability.xlsx')]
+        for frame, filename in zip(self.meeting_frames(**settings), filenames):
+            frame.to_excel(filename, index=False)
+        return filenames
+
+    def timetable(self, folder, n_courses=50, n_rooms=8, n_days=5, n_periods=6, n_curricula=15, n_lecturers=25,
+                  courses_per_curriculum=(2, 6), lectures=(1, 5), students=(10, 150), capacity=(20, 200), unavailability=0.05):
+        #Write a course timetabling instance as the .utt files read by DataObj and return the folder.
+        #unavailability is the share of course x day x period combinations where the course cannot be taught
+        rng = self.rng
+        os.makedirs(folder, exist_ok=True)
+        courses = [f'C{c:04d}' for c in range(n_courses)]
+        n_lectures = rng.integers(lectures[0], lectures[1]+1, size=n_courses)
+        min_days = np.minimum(rng.integers(1, n_days+1, size=n_courses), n_lectures)
+        courses_frame = pd.DataFrame({'Course': courses,
+                                      'Lecturer': [f'L{l:03d}' for l in rng.integers(0, n_lecturers, size=n_courses)],
+                                      'Number_of_lectures': n_lectures,
+                                      'Minimum_working_days': min_days,
+                                      'Number_of_students': rng.integers(students[0], students[1]+1, size=n_courses)})
+        rooms = pd.DataFrame({'Room': [f'R{r:03d}' for r in range(n_rooms)], 'Capacity': rng.integers(capacity[0], capacity[1]+1, size=n_rooms)})
+
+        relation = []
+        curricula = []
+        for q in range(n_curricula):
+            members = rng.choice(n_courses, size=int(rng.integers(courses_per_curriculum[0], min(courses_per_curriculum[1], n_courses)+1)), replace=False)
+            curricula.append((f'Q{q:03d}', len(members)))
+            relation += [(f'Q{q:03d}', courses[c]) for c in sorted(members)]
+        curricula = pd.DataFrame(curricula, columns=['Curriculum', 'Number_of_courses'])
+        relation = pd.DataFrame(relation, columns=['Curriculum', 'Course'])
+
+        blocked = np.argwhere(rng.random((n_courses, n_days, n_periods)) < unavailability)
+        unavail = pd.DataFrame({'Course': [courses[c] for c in blocked[:, 0]], 'Day': blocked[:, 1], 'Period': blocked[:, 2]})
+
+        basic = pd.DataFrame({'Courses': [n_courses], 'Rooms': [n_rooms], 'Days': [n_days], 'Periods_per_day': [n_periods],
+                              'Curricula': [n_curricula], 'Constraints': [len(unavail)], 'Lecturers': [courses_frame.Lecturer.nunique()]})
+
+        for name, frame in (('basic', basic), ('courses', courses_frame), ('curricula', curricula), ('relation', relation),
+                            ('rooms', rooms), ('unavailability', unavail)):
+            frame.to_csv(os.path.join(folder, name+'.utt'), sep=' ', index=False)
+        return folder
@@ -0,0 +1,172 @@
+import time
+import numpy as np
+
+
+class LocalSearch:
+
+    def __init__(self, state, weights=None, preferred=(9, 16), profiler=None):
+        #Improves a plan under soft constraints, keeping it free of conflicts. Works on a SolverState so a move only
+        #looks at the meetings and person days it touches. preferred is the time window (hours) meetings should be in
+        self.state = state
+        self.problem = state.problem
+        p = self.problem
+
+        #Penalty weights: per week into the year, per (quarters booked)^2 per person and day, per quarter outside
+        #the preferred window and per week a recurring meeting is off its series interval
+        self.weights = {'late': 1.0, 'load': 0.05, 'window': 1.0, 'spacing': 10.0}
+        self.weights.update(weights or {})
+        self.window = ((preferred[0]-p.day_start)*4, (preferred[1]-p.day_start)*4)
+
+        #Probability of each neighbourhood
+        self.neighbourhoods = {'move': 0.6, 'swap': 0.2, 'shift': 0.2}
+        self.max_week_step = 4    #Largest week change of a move or series shift
+
+        #Simulated annealing like ALNS: the start temperature accepts the average worsening move with probability 0.5,
+        #the end temperature is 1% of that. The average is taken over sample_moves random moves
+        self.sample_moves = 100
+        self.start_accept = 0.5
+        self.end_temperature_ratio = 0.01
+
+        self.profiler = profiler
+        if profiler is not None:
+            profiler.instrument(self, ['apply', 'undo', 'random_moves'])
+
+        self.gaps = np.flatnonzero(p.series_index > 0)   #Rows with a previous meeting in their series
+        self.objective = self.cost(range(p.num_meetings), self.booked_days(range(p.num_meetings)), self.gaps)
+
+    def booked_days(self, rows):
+        p, s = self.problem, self.state
+        return {(pers, s.week[m], s.day[m]) for m in rows for pers in p.meeting_persons[m]}
+
+    def row_gaps(self, rows):
+        #Series gaps touching the rows, given by the later row of each gap
+        p = self.problem
+        gaps = set()
+        for m in rows:
+            if p.series_index[m] > 0:
+                gaps.add(m)
+            if p.series_index[m] < p.series_size[p.series_of[m]]-1:
+                gaps.add(m+1)
+        return gaps
+
+    def cost(self, rows, days, gaps):
+        #Soft cost of the given meetings, person days and series gaps where they are placed now
+        p, s, w = self.problem, self.state, self.weights
+        rows = np.fromiter(rows, dtype=int)
+        gaps = np.fromiter(gaps, dtype=int)
+        start, end = s.kvarter[rows], s.kvarter[rows] + p.length[rows]
+        cost = w['late']*np.sum(s.week[rows]-1)
+        cost += w['window']*np.sum(np.maximum(self.window[0]-start, 0) + np.maximum(end-self.window[1], 0))
+        cost += w['spacing']*np.sum(np.abs(s.week[gaps] - s.week[gaps-1] - p.series_interval[p.series_of[gaps]]))
+        load = 0
+        for pers, week, day in days:
+            load += sum(p.length[m] for m in s.booked[pers].get((week, day), ()))**2
+        return cost + w['load']*load
+
+    def apply(self, moves):
+        #Make the moves as one step and return the change in the conflict count and in the soft objective
+        rows = [m for m, _, _, _ in moves]
+        gaps = self.row_gaps(rows)
+        days = self.booked_days(rows) | {(pers, week, day) for m, week, day, _ in moves for pers in self.problem.meeting_persons[m]}
+        before = self.cost(rows, days, gaps)
+        conflicts = self.state.move_many(moves)
+        delta = self.cost(rows, days, gaps) - before
+        self.objective += delta
+        return conflicts, delta
+
+    def undo(self, delta):
+        self.state.undo()
+        self.objective -= delta
+
+    def random_moves(self):
+        #Moves of a random neighbourhood: a meeting to another time, two meetings of the same length swapping times,
+        #or a whole series shifted some weeks
+        p, s = self.problem, self.state
+        kind = np.random.choice(list(self.neighbourhoods), p=list(self.neighbourhoods.values()))
+        if kind == 'shift':
+            series = np.random.randint(len(p.series))
+            step = np.random.randint(1, self.max_week_step+1)*np.random.choice((-1, 1))
+            return [(m, s.week[m]+step, s.day[m], s.kvarter[m]) for m in p.series[series]['rows']]
+        m = np.random.randint(p.num_meetings)
+        if kind == 'swap':
+            other = np.random.randint(p.num_meetings)
+            if other != m and p.length[other] == p.length[m]:
+                return [(m, s.week[other], s.day[other], s.kvarter[other]), (other, s.week[m], s.day[m], s.kvarter[m])]
+        week = s.week[m]
+        if np.random.random() < 0.3:
+            week = int(np.clip(week + np.random.randint(-self.max_week_step, self.max_week_step+1), 1, p.weeks))
+        return [(m, week, np.random.randint(1, p.days+1), np.random.randint(0, max(p.quarters-p.length[m], 0)+1))]
+
+    def inside(self, moves):
+        p = self.problem
+        return all(1 <= week <= p.weeks for _, week, _, _ in moves)
+
+    def start_temperature(self):
+        worse = []
+        for _ in range(self.sample_moves):
+            moves = self.random_moves()
+            if self.inside(moves):
+                conflicts, delta = self.apply(moves)
+                self.undo(delta)
+                if conflicts == 0 and delta > 0:
+                    worse.append(delta)
+        return max(-np.mean(worse)/np.log(self.start_accept), 1e-6) if worse else 1e-6
+
+    def Run(self, time_limit, max_iterations=None):
+        #Improve the plan for time_limit seconds and leave the best plan found in the state.
+        #Moves that add conflicts are never taken, so a feasible plan stays feasible.
+        #The best objective over time is kept in trajectory as (seconds, objective)
+        for _ in self.iterate(time_limit, max_iterations):
+            pass
+        return self.objective
+
+    def iterate(self, time_limit=None, max_iterations=None, stop=None):
+        #Run as a generator that yields (seconds, objective) every time a new best plan is found, with the best plan
+        #in the state while the caller looks at it. The search stops when time_limit seconds or max_iterations moves
+        #are used, when stop (e.g. a threading.Event) is set or when the caller closes the generator, and the best plan
+        #is left in the state in every case. Without a budget it runs until it is stopped, at the start temperature
+        s = self.state
+        start_time = time.perf_counter()
+        best_obj = self.objective
+        best = (s.week.copy(), s.day.copy(), s.kvarter.copy())
+        self.iterations = 0
+        self.trajectory = [(0.0, float(best_obj))]
+        if self.problem.num_meetings == 0:
+            return   #Nothing to move
+        start_temperature = self.start_temperature()
+        temperature = start_temperature
+
+        try:
+            while True:
+                elapsed = time.perf_counter()-start_time
+                #Share of the budget used, the temperature reaches its end value when the budget is used up
+                progress = max(elapsed/time_limit if time_limit else 0, self.iterations/max_iterations if max_iterations else 0)
+                if progress >= 1 or (time_limit is not None and elapsed >= time_limit) or (stop is not None and stop.is_set()):
+                    break
+                moves = self.random_moves()
+                self.iterations += 1
+                if not self.inside(moves):
+                    if self.profiler is not None:
+                        self.profiler.reject('LocalSearch.move', 'week')
+                    continue
+                conflicts, delta = self.apply(moves)
+                if conflicts > 0 or (conflicts == 0 and delta > 0 and np.random.random() >= np.exp(-delta/temperature)):
+                    self.undo(delta)
+                    if self.profiler is not None:
+                        self.profiler.reject('LocalSearch.move', 'conflict' if conflicts > 0 else 'annealing')
+                elif s.conflicts == 0 and self.objective < best_obj - 1e-9:
+                    best_obj = self.objective
+                    best = (s.week.copy(), s.day.copy(), s.kvarter.copy())
+                    self.trajectory.append((elapsed, float(best_obj)))
+                    yield self.trajectory[-1]
+
+                #Cool down so the end temperature is reached when the budget is used
+                temperature = start_temperature*self.end_temperature_ratio**min(progress, 1)
+        finally:
+            s.history.clear()
+            s.move_many([(m, best[0][m], best[1][m], best[2][m]) for m in range(self.problem.num_meetings)])
+            s.history.clear()
+            self.objective = best_obj
+            if self.profiler is not None:
+                self.profiler.record('LocalSearch.iterations', self.iterations)
+                self.profiler.record('LocalSearch.objective', float(best_obj))
@@ -0,0 +1,189 @@
+import numpy as np
+
+
+class MeetingProblem:
+
+    def __init__(self, data_reader, solver):
+        #Compiled, read only version of the meeting data. Built once per problem and shared by every check of a solve
+        self.data_reader = data_reader
+        self.calendar = solver.calendar
+        self.weeks = self.calendar.weeks
+        self.days = self.calendar.days
+        self.quarters = self.calendar.quarters
+        self.horizon = self.calendar.horizon   #Number of quarters we can plan in
+        self.day_start = self.calendar.day_start
+
+        m_data = data_reader.m_data.reset_index(drop=True)
+        self.num_meetings = len(m_data)
+        self.ids = m_data.ID.values
+        self.duration = m_data.duration.values.astype(float)
+        self.length = np.ceil(self.duration/15).astype(int)   #Meeting length in whole quarters
+
+        #Participants as integer ids and a person x meeting incidence matrix
+        participants = [p.split(',') for p in m_data.participants.values]
+        self.persons = sorted(set(p for parts in participants for p in parts))
+        self.person_idx = {p: i for i, p in enumerate(self.persons)}
+        self.num_persons = len(self.persons)
+        self.meeting_persons = [np.array([self.person_idx[p] for p in parts], dtype=int) for parts in participants]
+        self.incidence = np.zeros((self.num_persons, self.num_meetings), dtype=bool)
+        for m, persons in enumerate(self.meeting_persons):
+            self.incidence[persons, m] = True
+        self.attend_person, self.attend_meeting = np.nonzero(self.incidence)   #One entry per (person, meeting), sorted by person
+
+        #Unavailability as busy quarters, plus a running count per person so a busy check of any interval is two lookups
+        self.unavailable = self.busy_grid(data_reader)
+        self.busy_csum = np.zeros((self.num_persons, self.horizon+1), dtype=np.int32)
+        np.cumsum(self.unavailable.reshape(self.num_persons, self.horizon), axis=1, out=self.busy_csum[:, 1:])
+
+        self.series = self.get_series(m_data, data_reader.unique_dict)
+
+        #Conflict graph: the series sharing a participant with each series. Pairwise checks only need to look at these,
+        #see also meeting_neighbours
+        self.series_neighbours = self.conflict_graph()
+
+        #Merged unavailability of the participants of each series and the starts it leaves free, filled in when first asked for
+        self.busy_of = dict()
+        self.starts_of = dict()
+
+    def busy_grid(self, data_reader):
+        #Quarters of the calendar where each person is unavailable, unpacked from the occupancy bits of the data reader.
+        #Holidays are unavailable for everyone. Shape (persons, weeks, days, quarters)
+        occupancy = data_reader.get_occupancy(self.calendar)
+        grid = np.zeros((self.num_persons, self.weeks, self.days, self.quarters), dtype=bool)
+        rows = np.array([data_reader.person_row.get(p, -1) for p in self.persons], dtype=int)
+        known = rows >= 0
+        grid[known] = data_reader.unpack_occupancy(occupancy[rows[known]], self.calendar)
+        grid[:, self.calendar.closed] = True
+        return grid
+
+    def get_series(self, m_data, unique_dict):
+        #Group the expanded meeting rows into recurring series. Recurring meetings keep the week distance from unique_dict.
+        #Besides the list of series, every row gets its series (series_of) and its place in the series (series_index),
+        #so a whole plan can be built from one week per series with array operations
+        n = len(m_data)
+        ids = m_data.ID.values
+        recurring = (m_data.num_meetings.values != 1) & ~np.isnan(m_data.days_between.values.astype(float))
+        new_series = np.ones(n, dtype=bool)
+        new_series[1:] = ~recurring[1:] | ~recurring[:-1] | (ids[1:] != ids[:-1])
+        self.series_of = np.cumsum(new_series) - 1
+        self.series_first = np.flatnonzero(new_series)
+        self.series_size = np.diff(np.append(self.series_first, n))
+        self.series_index = np.arange(n) - self.series_first[self.series_of]
+        self.series_interval = np.array([int(unique_dict[ids[i]][0]) if size > 1 else 0
+                                         for i, size in zip(self.series_first, self.series_size)], dtype=int)
+
+        return [{'ID': ids[i],
+                 'rows': list(range(i, i+size)),
+                 'persons': self.meeting_persons[i],
+                 'length': int(self.length[i]),
+                 'interval': int(interval)}
+                for i, size, interval in zip(self.series_first, self.series_size, self.series_interval)]
+
+    def conflict_graph(self):
+        #The meetings of a series have the same participants, so only the first meeting of every series is used.
+        #Pair every (person, series) entry with the other entries of the same person
+        first_row = self.series_index[self.attend_meeting] == 0
+        person, series = self.attend_person[first_row], self.series_of[self.attend_meeting[first_row]]
+        n = len(self.series)
+        person_start = np.searchsorted(person, np.arange(self.num_persons+1))
+        count = np.diff(person_start)[person]
+        first = np.repeat(np.arange(len(person)), count)
+        second = person_start[person[first]] + np.arange(len(first)) - np.repeat(np.cumsum(count) - count, count)
+        keys = np.sort(series[first].astype(np.int64)*n + series[second])
+        keys = keys[np.append(True, keys[1:] != keys[:-1]) & (keys // n != keys % n)]
+        return np.split(keys % n, np.searchsorted(keys // n, np.arange(1, n)))
+
+    def components(self):
+        #Connected components of the conflict graph as arrays of series, largest first. Series in different components
+        #never share a participant, not even through other series, so the components can be planned independently.
+        #Every series takes the smallest label among its neighbours until nothing changes, jumping labels to speed it up
+        label = np.arange(len(self.series))
+        source = np.repeat(label, [len(n) for n in self.series_neighbours])
+        target = np.concatenate(self.series_neighbours) if len(self.series) > 0 else label
+        while True:
+            new = label.copy()
+            np.minimum.at(new, source, label[target])
+            new = new[new]
+            if (new == label).all():
+                break
+            label = new
+        groups = np.split(np.argsort(label, kind='stable'), np.flatnonzero(np.diff(np.sort(label))) + 1) if len(label) > 0 else []
+        return sorted(groups, key=lambda g: -sum(self.series_size[g]))
+
+    def meeting_neighbours(self, m):
+        #Meetings sharing a participant with meeting m: the other meetings of its series and those of the neighbouring series
+        rows = [self.series[i]['rows'] for i in (self.series_of[m], *self.series_neighbours[self.series_of[m]])]
+        others = np.concatenate(rows)
+        return others[others != m]
+
+    def free_starts(self, busy, length):
+        #(weeks, days, quarters) mask of the quarters where a meeting of the given length can start
+        csum = np.concatenate((np.zeros(busy.shape[:2] + (1,), dtype=int), np.cumsum(busy, axis=2)), axis=2)
+        starts = np.zeros(busy.shape, dtype=bool)
+        n = busy.shape[2] - length + 1
+        if n > 0:
+            starts[:, :, :n] = (csum[:, :, length:] - csum[:, :, :n]) == 0
+        return starts
+
+    def series_busy(self, i):
+        #(weeks, days, quarters) mask of the quarters where any participant of series i is unavailable
+        if i not in self.busy_of:
+            self.busy_of[i] = self.unavailable[self.series[i]['persons']].any(axis=0)
+        return self.busy_of[i]
+
+    def series_starts(self, i):
+        #Starts where every participant of series i is available for the whole meeting
+        if i not in self.starts_of:
+            self.starts_of[i] = self.free_starts(self.series_busy(i), self.series[i]['length'])
+        return self.starts_of[i]
+
+    def meeting_starts(self, m):
+        #The meetings of a series have the same participants and length, so they share the free starts
+        return self.series_starts(self.series_of[m])
+
+    def series_weeks(self, first_week):
+        #Week of every meeting row when series s starts in first_week[s]
+        return np.asarray(first_week, dtype=int)[self.series_of] + self.series_index*self.series_interval[self.series_of]
+
+    def last_first_week(self):
+        #Latest week each series can start in and still end inside the year
+        return np.maximum(self.weeks - (self.series_size-1)*self.series_interval, 1)
+
+    def start_quarters(self, week, day, kvarter):
+        #Absolute quarter offset from the start of week 1. week and day are 1-indexed like in the solution
+        return self.calendar.index(week, day, kvarter)
+
+    def violations(self, week, day, kvarter):
+        #All constraint violations of a full plan in one pass. Returns the offending meetings per constraint and the overlapping pairs
+        week, day, kvarter = np.asarray(week, dtype=int), np.asarray(day, dtype=int), np.asarray(kvarter, dtype=int)
+        day_length = np.flatnonzero(kvarter + self.duration/15 > self.quarters)
+        bad_week = np.flatnonzero((week < 1) | (week > self.weeks))
+        bad_day = np.flatnonzero((day < 1) | (day > self.days) | (kvarter < 0))
+        inside = np.ones(self.num_meetings, dtype=bool)
+        inside[day_length] = inside[bad_week] = inside[bad_day] = False
+
+        #Meetings running past the end of the day are already reported, so they only count until the day ends here
+        start = self.start_quarters(week, day, kvarter)
+        end = start + np.clip(self.quarters - kvarter, 0, self.length)
+
+        #Availability: busy quarters of every participant inside the meeting, for meetings placed inside the calendar
+        p, m = self.attend_person, self.attend_meeting
+        ok = inside[m]
+        busy = self.busy_csum[p[ok], end[m[ok]]] - self.busy_csum[p[ok], start[m[ok]]]
+        unavailable = np.unique(m[ok][busy > 0])
+
+        #Overlap: per person, sort the attended meetings by start and pair each with the later ones starting before it ends
+        time_span = int(max(end.max(), self.horizon) - min(start.min(), 0)) + 1 if self.num_meetings > 0 else 1
+        offset = -min(start.min(), 0) if self.num_meetings > 0 else 0
+        key_start = p.astype(np.int64)*time_span + start[m] + offset
+        key_end = p.astype(np.int64)*time_span + end[m] + offset
+        order = np.lexsort((start[m], p))
+        key_start, key_end, sorted_meeting = key_start[order], key_end[order], m[order]
+        stop = np.searchsorted(key_start, key_end, side='left')
+        counts = np.maximum(stop - np.arange(len(order)) - 1, 0)
+        first = np.repeat(np.arange(len(order)), counts)
+        second = first + 1 + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        pairs = np.sort(np.stack((sorted_meeting[first], sorted_meeting[second]), axis=1), axis=1)
+        overlap = np.unique(pairs, axis=0) if len(pairs) > 0 else pairs.reshape(0, 2)
+
+        return {'day_length': day_length, 'week': bad_week, 'day': bad_day, 'unavailable': unavailable, 'overlap': overlap}
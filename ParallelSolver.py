@@ -0,0 +1,95 @@
+import copy
+import multiprocessing as mp
+import os
+import time
+import numpy as np
+import dataReader
+
+# Read only data of the worker processes. With fork the workers inherit it from the parent without any copying.
+# Otherwise a data reader with a cache folder is memory mapped from the cache by every worker, and anything else
+# is pickled once per worker by the pool initializer, never once per task
+_shared = dict()
+
+
+def _init_worker(shared):
+    _shared.update(shared)
+    if 'cache_folder' in shared:
+        data_reader = dataReader.dataReader()
+        data_reader.load_cache(shared['cache_folder'], mmap=True)
+        _shared['data_reader'] = data_reader
+
+
+def make_pool(processes, shared):
+    if 'fork' in mp.get_all_start_methods():
+        _shared.clear()
+        _shared.update(shared)
+        return mp.get_context('fork').Pool(processes)
+    data_reader = shared.get('data_reader')
+    if data_reader is not None and data_reader.cache_folder is not None:
+        shared = dict(shared)
+        shared['cache_folder'] = shared.pop('data_reader').cache_folder
+        if 'solver' in shared:
+            #The compiled problem refers to the parent's data reader, so the workers compile their own
+            shared['solver'] = copy.copy(shared['solver'])
+            shared['solver'].problem = None
+    return mp.get_context('spawn').Pool(processes, initializer=_init_worker, initargs=(shared,))
+
+
+def _solve_seed(args):
+    seed, mode, time_limit, weights = args
+    np.random.seed(seed)
+    solver, data_reader = _shared['solver'], _shared['data_reader']
+    start = time.time()
+    sol = solver.Solve(data_reader, mode=mode, time_limit=time_limit, weights=weights)
+    stats = {'seed': seed, 'pid': os.getpid(), 'time': time.time()-start, 'feasible': sol is not None and solver.check_feasibility(sol, data_reader)}
+    #Soft objective of the optimizing modes, lower is better. Only comparable between starts of the same mode
+    stats['objective'] = None
+    if sol is not None and mode == 'optimize':
+        stats['objective'] = float(solver.search.objective)
+    elif sol is not None and mode == 'exact':
+        stats['objective'] = float(solver.exact.cp_solver.ObjectiveValue()/100)
+    return sol, stats
+
+
+def _solve_component(args):
+    ids, mode, time_limit, weights, seed = args
+    np.random.seed(seed)
+    solver, data_reader = _shared['solver'], _shared['data_reader']
+    start = time.time()
+    sol = solver.solve_component(data_reader, ids, mode, time_limit, weights)
+    stats = {'seed': seed, 'pid': os.getpid(), 'meetings': 0 if sol is None else len(sol), 'time': time.time()-start, 'feasible': sol is not None}
+    return sol, stats
+
+
+class ParallelSolver:
+
+    def __init__(self, solver, processes=None):
+        #Runs independent seeded solves of the given Solver in a process pool
+        self.solver = solver
+        self.processes = processes or os.cpu_count()
+
+    def Solve(self, data_reader, n_starts=None, mode='constructive', seed=0, time_limit=10, weights=None):
+        #Best solution of n_starts seeded solves and the statistics of every start. time_limit and weights are passed
+        #to Solver.Solve for every start
+        n_starts = n_starts or self.processes
+        self.solver.get_problem(data_reader)   #Compile once in the parent so the workers get the compiled problem
+        with make_pool(self.processes, {'solver': self.solver, 'data_reader': data_reader}) as pool:
+            results = pool.map(_solve_seed, [(seed+i, mode, time_limit, weights) for i in range(n_starts)])
+        self.stats = [stats for _, stats in results]
+        best = min(range(len(results)), key=lambda i: self.rank(results[i][0], results[i][1]))
+        return results[best][0]
+
+    def solve_components(self, data_reader, mode='constructive', time_limit=10, weights=None, seed=0):
+        #Solver.solve_components with the independent groups of meetings planned in the process pool, largest first
+        solver = self.solver
+        components = solver.find_components(data_reader)
+        tasks = [(ids, mode, limit, weights, seed+i) for i, (ids, limit) in enumerate(zip(components, solver.time_shares(data_reader, components, time_limit)))]
+        with make_pool(self.processes, {'solver': solver, 'data_reader': data_reader}) as pool:
+            results = pool.map(_solve_component, tasks, chunksize=1)
+        self.components = components
+        self.stats = [stats for _, stats in results]
+        return solver.merge(data_reader, components, [sol for sol, _ in results])
+
+    def rank(self, sol, stats):
+        #Feasible solutions first, then the lowest objective of the optimizing modes, then the fastest
+        return (not stats['feasible'], stats['objective'] if stats['objective'] is not None else 0, stats['time'])
@@ -1,20 +1,151 @@
+import numpy as np
+from datetime import datetime
+
 class ALNS:
     def __init__(self, DataObject):
         self.Data = DataObject
-        
-    def Run(runLenght):
+        # operators are timed with the profiler of the data object, if it has one
+        self.profiler = DataObject.profiler
+
+        # registry of destroy and repair operators. Destroy operators are called as op(solution, no_of_destroys),
+        # repair operators as op(solution), and both return the change in objective
+        self.destroy_ops = dict()
+        self.repair_ops = dict()
+        self.destroy_weights = dict()
+        self.repair_weights = dict()
+        self.register_destroy('random', DataObject.RandDestroy)
+        self.register_destroy('worst', DataObject.WorstDestroy)
+        self.register_destroy('related', DataObject.RelatedDestroy)
+        self.register_destroy('day', DataObject.DayDestroy)
+        self.register_repair('greedy', DataObject.GreedyRepair)
+        self.register_repair('regret', DataObject.RegretRepair)
+
+        # share of the scheduled lectures removed by a destroy operator
+        self.destroy_min = 0.05
+        self.destroy_max = 0.3
+
+        # adaptive weights: scores for a new best, an improving and an accepted solution, updated every segment
+        self.score_best = 33
+        self.score_better = 9
+        self.score_accepted = 13
+        self.reaction = 0.1
+        self.segment_length = 50
+
+        # simulated annealing: start temperature accepts a solution 5% worse with probability 0.5, end temperature is 1% of that
+        self.start_worse = 0.05
+        self.start_accept = 0.5
+        self.end_temperature_ratio = 0.01
+
+    def register_destroy(self, name, op):
+        if self.profiler is not None:
+            op = self.profiler.wrap('ALNS.destroy.'+name, op)
+        self.destroy_ops[name] = op
+        self.destroy_weights[name] = 1.0
+
+    def register_repair(self, name, op):
+        if self.profiler is not None:
+            op = self.profiler.wrap('ALNS.repair.'+name, op)
+        self.repair_ops[name] = op
+        self.repair_weights[name] = 1.0
+
+    def select(self, weights):
+        # roulette wheel selection
+        names = list(weights.keys())
+        w = np.array([weights[n] for n in names], dtype=float)
+        return names[np.random.choice(len(names), p=w/w.sum())]
+
+    def Run(self, runLength, initial=None, max_iterations=None):
+        # run ALNS for runLength seconds and leave the best solution found in the data object.
+        # initial is a snapshot of the data object to continue from instead of a new random initial solution.
+        # The operator weights are kept between runs
+        for _ in self.Iterate(runLength, initial, max_iterations):
+            pass
+        return self.best_obj
+
+    def Iterate(self, runLength=None, initial=None, max_iterations=None, stop=None):
+        # Run as a generator that yields (seconds, objective, iteration) for every new best solution, while the data
+        # object holds that solution. It stops after runLength seconds or max_iterations iterations, when stop (e.g. a
+        # threading.Event) is set or when the caller closes the generator, and leaves the best solution in the data
+        # object in every case
         start_time = datetime.now()
-        max_sec = start_time + timedelta(seconds= 1000*runlenght)
-        print("Start")
-
-        self.Data.generate_initial_solution()
-
-        while((datetime.now() < max_sec):
-              # Run the algorithm
-              
-              # 1: Select destroy and repair methods
-              # 2: Compute new solution given above methods
-              # 3: If accept(x_temporary, x) then x = x_temporary
-              # 4: If c(x_temporary) < c(x_best) then x_best = x_temporary
-              # 5: update rho- and rho+ (probabilities for selecting the different destroy/repair)
-              
\ No newline at end of file
+
+        if initial is None:
+            self.Data.generate_initial_solution()
+        else:
+            self.Data.restore(initial)
+
+        obj = self.Data.solution_eval()[0]
+        best_obj = obj
+        best = self.Data.snapshot()
+
+        destroy_weights = self.destroy_weights
+        repair_weights = self.repair_weights
+        destroy_scores = {name: [0.0, 0] for name in self.destroy_ops}
+        repair_scores = {name: [0.0, 0] for name in self.repair_ops}
+
+        start_temperature = max(-self.start_worse*obj/np.log(self.start_accept), 1e-6)
+        temperature = start_temperature
+        self.iterations = 0
+        self.objective_history = [(0.0, obj)]
+
+        try:
+            while self.progress(start_time, runLength, max_iterations) < 1 and not (stop is not None and stop.is_set()):
+                # 1: Select destroy and repair methods
+                destroy = self.select(destroy_weights)
+                repair = self.select(repair_weights)
+
+                # 2: Compute new solution given above methods
+                current = self.Data.snapshot()
+                nr_scheduled = len(self.Data.scheduled_entries())
+                no_of_destroys = max(1, int(nr_scheduled*np.random.uniform(self.destroy_min, self.destroy_max)))
+                new_obj = obj + self.destroy_ops[destroy](self.Data.solution, no_of_destroys)
+                new_obj += self.repair_ops[repair](self.Data.solution)
+
+                # 3: If accept(x_temporary, x) then x = x_temporary
+                score = 0
+                if new_obj < obj:
+                    score = self.score_better
+                    obj = new_obj
+                elif np.random.random() < np.exp((obj-new_obj)/temperature):
+                    score = self.score_accepted
+                    obj = new_obj
+                else:
+                    self.Data.restore(current)
+                    if self.profiler is not None:
+                        self.profiler.reject('ALNS.accept', destroy+'/'+repair)
+
+                # 4: If c(x_temporary) < c(x_best) then x_best = x_temporary
+                if obj < best_obj:
+                    best_obj = obj
+                    best = self.Data.snapshot()
+                    score = self.score_best
+                    self.objective_history.append(((datetime.now()-start_time).total_seconds(), best_obj))
+                    yield self.objective_history[-1] + (self.iterations,)
+
+                # 5: update rho- and rho+ (probabilities for selecting the different destroy/repair)
+                destroy_scores[destroy][0] += score
+                destroy_scores[destroy][1] += 1
+                repair_scores[repair][0] += score
+                repair_scores[repair][1] += 1
+                self.iterations += 1
+                if self.iterations % self.segment_length == 0:
+                    for weights, scores in ((destroy_weights, destroy_scores), (repair_weights, repair_scores)):
+                        for name in weights:
+                            if scores[name][1] > 0:
+                                weights[name] = (1-self.reaction)*weights[name] + self.reaction*scores[name][0]/scores[name][1]
+                            weights[name] = max(weights[name], 1e-3)
+                            scores[name] = [0.0, 0]
+
+                # cool down so the end temperature is reached when the time or the iterations are used up
+                temperature = start_temperature*self.end_temperature_ratio**min(self.progress(start_time, runLength, max_iterations), 1)
+        finally:
+            self.Data.restore(best)
+            self.best_obj = best_obj
+            if self.profiler is not None:
+                self.profiler.record('ALNS.iterations', self.iterations)
+                self.profiler.record('ALNS.best objective', int(best_obj))
+
+    def progress(self, start_time, runLength, max_iterations):
+        # share of the time or iteration budget used, whichever is larger
+        seconds = (datetime.now()-start_time).total_seconds()/max(runLength, 1e-9) if runLength is not None else 0
+        return max(seconds, self.iterations/max_iterations if max_iterations is not None else 0)
@@ -0,0 +1,75 @@
+import multiprocessing as mp
+import os
+import numpy as np
+from datetime import datetime
+from ALNS import ALNS
+
+# The data object of the worker processes. With fork the workers inherit it from the parent without reading the
+# files again or pickling the pandas frames, otherwise it is pickled once per worker by the pool initializer
+_shared = dict()
+
+def _init_worker(shared):
+    _shared.update(shared)
+
+def make_pool(processes, shared):
+    if 'fork' in mp.get_all_start_methods():
+        _shared.clear()
+        _shared.update(shared)
+        return mp.get_context('fork').Pool(processes)
+    return mp.get_context('spawn').Pool(processes, initializer=_init_worker, initargs=(shared,))
+
+def _run_island(args):
+    # one epoch of one island: ALNS from the island's current solution (or a new one) for epoch_length seconds
+    seed, initial, weights, epoch_length = args
+    np.random.seed(seed)
+    alns = ALNS(_shared['data'])
+    if weights is not None:
+        alns.destroy_weights.update(weights[0])
+        alns.repair_weights.update(weights[1])
+    best_obj = alns.Run(epoch_length, initial)
+    stats = {'seed': seed, 'pid': os.getpid(), 'iterations': alns.iterations, 'best_obj': best_obj}
+    return alns.Data.snapshot(), best_obj, (alns.destroy_weights, alns.repair_weights), stats
+
+class ALNSIslands:
+    def __init__(self, DataObject, islands=None, processes=None):
+        # independent ALNS runs in a process pool that share their best solution every epoch
+        self.Data = DataObject
+        self.processes = processes or os.cpu_count()
+        self.islands = islands or self.processes
+
+    def Run(self, runLength, epoch_length=None, seed=0):
+        # run for runLength seconds. With an epoch_length the islands stop every epoch_length seconds and the
+        # worst half restarts from the best solution found so far; without it they run independently (multi-start)
+        epoch_length = epoch_length or runLength
+        start_time = datetime.now()
+        snapshots = [None]*self.islands
+        weights = [None]*self.islands
+        self.stats = [[] for _ in range(self.islands)]
+        best_obj, best = None, None
+        epoch = 0
+        # with more islands than processes an epoch runs the islands in several batches, so each gets its share of it
+        batches = -(-self.islands//self.processes)
+        with make_pool(self.processes, {'data': self.Data}) as pool:
+            while (datetime.now()-start_time).total_seconds() < runLength:
+                length = min(epoch_length, runLength-(datetime.now()-start_time).total_seconds())/batches
+                args = [(seed+epoch*self.islands+i, snapshots[i], weights[i], length) for i in range(self.islands)]
+                results = pool.map(_run_island, args, chunksize=1)
+                objs = [r[1] for r in results]
+                for i, (snapshot, obj, w, stats) in enumerate(results):
+                    snapshots[i], weights[i] = snapshot, w
+                    self.stats[i].append(stats)
+                    if best_obj is None or obj < best_obj:
+                        best_obj, best = obj, snapshot
+                # migration: the worst half of the islands continues from the best solution
+                for i in np.argsort(objs)[::-1][:self.islands//2]:
+                    snapshots[i] = best
+                epoch += 1
+
+        if best is None:
+            # no epoch was run (runLength <= 0): leave an initial solution like ALNS.Run does
+            self.Data.generate_initial_solution()
+            best_obj = self.Data.solution_eval()[0]
+        else:
+            self.Data.restore(best)
+        self.best_obj = best_obj
+        return best_obj
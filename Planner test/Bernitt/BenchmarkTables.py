@@ -0,0 +1,65 @@
+import sys
+import time
+import numpy as np
+from DataObj import DataObj
+
+# Per call timing of the hot paths using the compiled ProblemTables against the data frame lookups they replaced.
+# Usage: python BenchmarkTables.py <folder with .utt files> [calls]
+
+def pandas_check_feasibility(data,entry,course_nr):
+    # check_feasibility with data frame lookups, as before the compiled tables
+    D,P,R = entry
+    c_name = data.courses.loc[course_nr,'Course']
+    if data.solution[D,P,R]!=data.EMPTY:
+        return False
+    try:
+        course_unavail = data.unavailability.get_group(c_name)
+        if np.logical_and(course_unavail['Day'] == D,course_unavail['Period'] == P).any():
+            return False
+    except KeyError:
+        pass
+    active_courses = np.append(data.solution[D,P,:][data.solution[D,P,:]!=data.EMPTY],course_nr).astype(int)
+    active_curricula = []
+    for c_nr in active_courses:
+        active_curricula += data.course2curr.get(data.courses.loc[c_nr,'Course'],[])
+    active_lecturers = list(data.courses.loc[active_courses,'Lecturer'])
+    return len(active_courses)==len(set(active_courses)) and len(active_curricula)==len(set(active_curricula)) and len(active_lecturers)==len(set(active_lecturers))
+
+def pandas_delta_lookups(data,entry,c_nr):
+    # the data frame lookups delta_eval did per call
+    D,P,R = entry
+    room_cap = data.rooms.loc[R,'Capacity']
+    nr_stud = data.courses.loc[c_nr,'Number_of_students']
+    min_work_days = data.courses.loc[c_nr,'Minimum_working_days']
+    curricula = data.course2curr.get(data.courses.loc[c_nr,'Course'],[])
+    return max(nr_stud-room_cap,0), min_work_days, curricula
+
+def array_delta_lookups(data,entry,c_nr):
+    D,P,R = entry
+    t = data.tables
+    return t.overflow[c_nr,R], t.min_days[c_nr], t.course_curr[c_nr]
+
+def time_calls(fn,data,calls):
+    start = time.perf_counter()
+    for entry,c_nr in calls:
+        fn(data,entry,c_nr)
+    return (time.perf_counter()-start)/len(calls)*1e6
+
+if __name__ == '__main__':
+    np.random.seed(0)
+    data = DataObj(sys.argv[1])
+    nr_calls = int(sys.argv[2]) if len(sys.argv)>2 else 2000
+    data.generate_initial_solution()
+    entries = np.argwhere(data.solution==data.EMPTY)
+    if len(entries)==0:
+        sys.exit('The initial solution leaves no free entries to time the calls on')
+    calls = [(tuple(entries[np.random.randint(len(entries))]),int(np.random.choice(data.lectures))) for _ in range(nr_calls)]
+
+    # both versions must agree before they are compared
+    assert all(pandas_check_feasibility(data,e,c)==data.check_feasibility(e,c) for e,c in calls)
+
+    rows = [('check_feasibility',time_calls(pandas_check_feasibility,data,calls),time_calls(DataObj.check_feasibility,data,calls)),
+            ('delta_eval lookups',time_calls(pandas_delta_lookups,data,calls),time_calls(array_delta_lookups,data,calls))]
+    print(f"{'':20s}{'pandas us/call':>16s}{'arrays us/call':>16s}{'speedup':>10s}")
+    for name,old,new in rows:
+        print(f"{name:20s}{old:16.2f}{new:16.2f}{old/new:10.1f}")
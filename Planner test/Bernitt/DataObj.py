@@ -1,10 +1,12 @@
 import numpy as np
 import pandas as pd
 import os
+from ProblemTables import ProblemTables
+from FreeSlots import FreeSlots
  
 class DataObj:
  
-    def __init__(self,data_path):
+    def __init__(self,data_path,profiler=None):
  
         # read in data files
         self.data_path = data_path
@@ -20,10 +22,19 @@ class DataObj:
         self.nConstraints = self.basic['Constraints'][0]
         self.nLecturers = self.basic['Lecturers'][0]
  
-        # initialize lists used to generate the solution
+        # compiled arrays used by the hot paths instead of the data frames
+        self.tables = ProblemTables(self)
+ 
+        # initialize lists used to generate the solution. The solution holds the course number of the lecture in
+        # every (day, period, room) entry and EMPTY in free entries, placement the entry of every lecture
+        # (EMPTY for unscheduled lectures), so both directions are a lookup
         self.lectures = self.generate_lecture_list()
         self.unscheduled = []
-        self.solution = np.nan*np.ones((self.nDays,self.nPeriods,self.nRooms)).astype(int)
+        self.EMPTY = -1
+        self.dtype = np.int16 if self.tables.nCourses<np.iinfo(np.int16).max else np.int32
+        self.solution = np.full((self.nDays,self.nPeriods,self.nRooms),self.EMPTY,dtype=self.dtype)
+        self.placement = np.full((len(self.lectures),3),self.EMPTY,dtype=self.dtype)
+        self.free_slots = FreeSlots(self.solution.shape)
  
         # objective function penalties
         self.unscheduled_penal = 10
@@ -31,6 +42,16 @@ class DataObj:
         self.min_work_penal = 5
         self.curr_compact_penal = 2
         self.room_stab_penal = 1
+        self.penalties = np.array([self.unscheduled_penal,self.room_cap_penal,self.min_work_penal,self.curr_compact_penal,self.room_stab_penal])
+ 
+        self.init_state()
+ 
+        # optional profiler (see Profiler.py in the meeting planner), times the hot paths and counts rejected entries.
+        # Without one the methods are left as they are
+        self.profiler = profiler
+        if profiler is not None:
+            profiler.instrument(self,['check_feasibility','feasible_entries','delta_eval','delta_eval_all','insert','remove','init_state',
+                                      'snapshot','restore','insertion_costs'])
  
     def readfiles(self,filenames):
         # read in data files and store them in a dictionary
@@ -46,6 +67,7 @@ class DataObj:
         self.relation = data_dict['relation']
         self.curricula = data_dict['curricula']
         self.unavailability = data_dict['unavailability']
+        self.unavailability_table = data_dict['unavailability']
  
         # create dictionary mapping courses to the corresponding curricula
         self.course2curr = dict()
@@ -61,251 +83,404 @@ class DataObj:
  
     def generate_lecture_list(self):
         # generate lecture list by looping through all course names and adding entries equal to the number of lectures
-        lectures = []
-        for c_nr in self.courses.index:
-            nlec = self.courses.loc[c_nr,'Number_of_lectures']
-            lectures += [c_nr]*nlec
+        lectures = np.repeat(np.arange(self.tables.nCourses),self.tables.n_lectures)
  
-        return np.array(lectures).astype(int)
+        return lectures.astype(int)
  
     def check_feasibility(self,entry,course_nr):
         # check the feasibility of adding a given entry to the solution
  
-        # unpack day, period and room + course name
+        # unpack day, period and room
         D,P,R = entry
-        c_name = self.courses.loc[course_nr,'Course']
+        course_nr = int(course_nr)
+        t = self.tables
  
         # check whether entry collides with existing entries
-        if ~np.isnan(self.solution[D,P,R]):
-            return False
+        if self.solution[D,P,R]!=self.EMPTY:
+            return self.rejected('occupied')
  
         # check course availability
-        try:
-            course_unavail = self.unavailability.get_group(c_name)
-            if np.logical_and(course_unavail['Day'] == D,course_unavail['Period'] == P).any():
-                #print(course_name,'is not available at this timeslot:',D,P)
-                return False
-        except KeyError:
-            pass
- 
-        # get active courses, curricula and lecturers for the given day and period
-        active_courses = self.solution[D,P,:][~np.isnan(self.solution[D,P,:])]
-        active_curricula = self.get_list_of_course_curricula(active_courses)
-        active_lecturers = self.courses.loc[active_courses,'Lecturer']
- 
-        # check conflicts
-        if len(active_courses)!=len(set(active_courses)):
-            return False
-        elif len(active_curricula)!=len(set(active_curricula)):
-            return False
-        elif len(active_lecturers)!=len(set(active_lecturers)):
-            return False
+        if t.unavailable[course_nr,D,P]:
+            return self.rejected('unavailable')
+ 
+        # check conflicts in the given day and period: same course, same lecturer or a shared curriculum
+        if self.course_period_count[course_nr,D,P]>0:
+            return self.rejected('course')
+        elif self.lecturer_period_count[t.lecturer[course_nr],D,P]>0:
+            return self.rejected('lecturer')
+        elif self.curr_period_count[t.course_curr[course_nr],D,P].any():
+            return self.rejected('curriculum')
         else:
             return True
  
+    def rejected(self,reason):
+        if self.profiler is not None:
+            self.profiler.reject('DataObj.check_feasibility',reason)
+        return False
+ 
+    def feasible_entries(self,c_nr):
+        # free entries where lecture c_nr can be inserted: periods where the course is unavailable or where the course,
+        # its lecturer or one of its curricula already has a lecture are masked out before looking at the free entries
+        t = self.tables
+        blocked = t.unavailable[c_nr] | (self.course_period_count[c_nr]>0) | (self.lecturer_period_count[t.lecturer[c_nr]]>0)
+        if len(t.course_curr[c_nr])>0:
+            blocked = blocked | (self.curr_period_count[t.course_curr[c_nr]]>0).any(axis=0)
+        slots = self.free_slots.entries()
+        if self.profiler is not None:
+            self.count_rejections(c_nr,slots)
+        return slots[~blocked[slots[:,0],slots[:,1]]]
+ 
+    def count_rejections(self,c_nr,slots):
+        # free entries rejected for lecture c_nr per constraint, each entry counted for the first constraint it breaks
+        t = self.tables
+        D,P = slots[:,0],slots[:,1]
+        left = np.ones(len(slots),dtype=bool)
+        for reason,mask in (('unavailable',t.unavailable[c_nr]),
+                            ('course',self.course_period_count[c_nr]>0),
+                            ('lecturer',self.lecturer_period_count[t.lecturer[c_nr]]>0),
+                            ('curriculum',(self.curr_period_count[t.course_curr[c_nr]]>0).any(axis=0))):
+            hit = left & mask[D,P]
+            if hit.any():
+                self.profiler.reject('DataObj.feasible_entries',reason,int(hit.sum()))
+            left &= ~hit
+ 
     def get_list_of_course_curricula(self,courses):
         curricula = []
         for c_nr in courses:
-            c_name = self.courses.loc[c_nr,'Course']
-            curricula+=self.course2curr[c_name]
+            curricula+=[self.tables.curr_names[q] for q in self.tables.course_curr[int(c_nr)]]
         return curricula
  
     def generate_initial_solution(self):
-        # generate a random initial solution
-        lectures = self.lectures.copy()
-        np.random.shuffle(lectures)
+        # generate a random initial solution, starting from an empty timetable
+        self.solution[:] = self.EMPTY
+        self.placement[:] = self.EMPTY
+        self.unscheduled = []
+        self.init_state()
+        order = np.random.permutation(len(self.lectures))
  
         # loop over all lecture id's
-        for c_nr in lectures:
-            # get the unused positions in the solution matrix
-            free_pos = np.argwhere(np.isnan(self.solution))
-            # randomly shuffle the positions
-            np.random.shuffle(free_pos)
-            # loop over all free positions
-            for i in range(len(free_pos)):
-                D,P,R = free_pos[i]
-                # insert the entry if the solution is still feasible
-                if self.check_feasibility((D,P,R),c_nr) is True:
-                    self.solution[D,P,R] = c_nr
-                    #print(lec_id,'assigned')
-                    break
+        for lecture in order:
+            c_nr = self.lectures[lecture]
+            # get the free positions where the lecture fits and pick one at random
+            entries = self.feasible_entries(c_nr)
+            if len(entries)>0:
+                D,P,R = entries[np.random.randint(len(entries))]
+                self.solution[D,P,R] = c_nr
+                self.placement[lecture] = D,P,R
+                self.update_state((D,P,R),c_nr,1)
             # append to the unscheduled list if the lecture cannot be placed in the solution matrix
-            if i==len(free_pos)-1:
-                self.unscheduled.append(c_nr)
-                #print(lec_id,'added to the unscheduled list')
+            else:
+                self.unscheduled.append(int(c_nr))
+ 
+        self.init_state()
+ 
+    def init_state(self):
+        # build the objective state from the solution matrix and the unscheduled list:
+        # lectures per course and day, per course and room, per curriculum, day and period, and the objective components
+        # the counters are bounded by the number of rooms or lectures of a course, so they are kept as 16 bit
+        self.course_day_count = np.zeros((self.nCourses,self.nDays),dtype=np.int16)
+        self.course_room_count = np.zeros((self.nCourses,self.nRooms),dtype=np.int16)
+        self.curr_period_count = np.zeros((self.tables.nCurricula,self.nDays,self.nPeriods),dtype=np.int16)
+        self.course_period_count = np.zeros((self.nCourses,self.nDays,self.nPeriods),dtype=np.int16)
+        self.lecturer_period_count = np.zeros((len(self.tables.lecturer_names),self.nDays,self.nPeriods),dtype=np.int16)
+        entries = self.scheduled_entries()
+        c_nrs = self.solution[tuple(entries.T)].astype(int)
+        np.add.at(self.course_day_count,(c_nrs,entries[:,0]),1)
+        np.add.at(self.course_room_count,(c_nrs,entries[:,2]),1)
+        np.add.at(self.course_period_count,(c_nrs,entries[:,0],entries[:,1]),1)
+        np.add.at(self.lecturer_period_count,(self.tables.lecturer[c_nrs],entries[:,0],entries[:,1]),1)
+        self.free_slots.rebuild(self.solution==self.EMPTY)
+        for (D,P,R),c_nr in zip(entries,c_nrs):
+            self.curr_period_count[self.tables.course_curr[c_nr],D,P] += 1
+ 
+        self.course_days_used = (self.course_day_count>0).sum(axis=1)
+        self.course_rooms_used = (self.course_room_count>0).sum(axis=1)
+ 
+        overflow = self.tables.overflow[c_nrs,entries[:,2]]
+        occupied = self.curr_period_count>0
+        before = np.concatenate((np.zeros(occupied.shape[:2]+(1,),dtype=bool),occupied[:,:,:-1]),axis=2)
+        after = np.concatenate((occupied[:,:,1:],np.zeros(occupied.shape[:2]+(1,),dtype=bool)),axis=2)
+ 
+        self.components = np.array([len(self.unscheduled),
+                                    overflow.sum(),
+                                    np.maximum(self.tables.min_days-self.course_days_used,0).sum(),
+                                    np.sum(occupied & ~before & ~after),
+                                    np.maximum(self.course_rooms_used-1,0).sum()],dtype=int)
+        self.obj_val = int(self.penalties@self.components)
+ 
+    def performance(self):
+        # objective and its components from the maintained state, O(1)
+        return [self.obj_val]+list(self.components)
  
     def solution_eval(self):
-        # unscheduled
-        unscheduled_val = len(self.unscheduled)
- 
-        # room capacity
-        entries = np.argwhere(~np.isnan(self.solution))
-        room_cap_val=0
-        for e in entries:
-            D,P,R = e
-            c_nr = self.solution[D,P,R]
-            room_cap = self.rooms.loc[R,'Capacity']
-            nr_stud = self.courses.loc[c_nr,'Number_of_students']
-            room_overflow = nr_stud-room_cap
-            if room_overflow>0:
-                room_cap_val+=room_overflow
- 
-        # not all courses may be present in the solution
-        courses = np.unique(self.solution[~np.isnan(self.solution)]).astype(int)
- 
-        # room stability
-        room_stab_val=0
-        for c_nr in courses:
-            distinct_rooms = set(np.argwhere(self.solution==c_nr)[:,2])
-            room_stab_val+=len(distinct_rooms)-1
- 
-        # minimum working days
-        min_work_val = 0
-        for c_nr in courses:
-            distinct_days = set(np.argwhere(self.solution==c_nr)[:,0])
-            min_work_days = self.courses.loc[c_nr,'Minimum_working_days']
-            diff = min_work_days-len(distinct_days)
-            if diff>0:
-                min_work_val+=diff
- 
-        # curriculum compactness
-        curr_compact_val = 0
-        for curr_nr in range(self.nCurricula):
-            curr = self.curricula.loc[curr_nr,'Curriculum']
-            curr_courses = self.curr2course[curr]
- 
-            bool_array = np.zeros(self.solution.shape,dtype=bool)
-            for c_name in curr_courses:
-                c_nr = np.argwhere(self.courses.Course==c_name)[0][0]
-                bool_array+=(self.solution==c_nr)
- 
-            for d in range(self.nDays):
-                curr_periods = np.argwhere(bool_array[d,:,:]==True)[:,0]
-                for p in curr_periods:
-                    if p==0:
-                        if p+1 not in curr_periods:
-                            curr_compact_val+=1
-                    if p==(self.nPeriods-1):
-                        if p-1 not in curr_periods:
-                            curr_compact_val+=1
-                    else:
-                        if p-1 not in curr_periods or p+1 not in curr_periods:
-                            curr_compact_val+=1
- 
-        print('unscheduled:', unscheduled_val)
-        print('room capacity:', room_cap_val)
-        print('minimum work:', min_work_val)
-        print('curr compactness:', curr_compact_val)
-        print('room stability:', room_stab_val)
- 
-        # objective value
-        obj_val = (self.unscheduled_penal*unscheduled_val +
-                   self.room_cap_penal*room_cap_val +
-                   self.min_work_penal*min_work_val +
-                   self.curr_compact_penal*curr_compact_val +
-                   self.room_stab_penal*room_stab_val)
-        
-        performance=[obj_val,unscheduled_val,room_cap_val,min_work_val,curr_compact_val,room_stab_val]
-        return performance 
- 
-    def delta_eval(self,entry,c_nr):
- 
+        # evaluate the solution from scratch
+        self.init_state()
+        if self.profiler is not None:
+            for name,val in zip(['unscheduled','room capacity','minimum work','curr compactness','room stability'],self.components):
+                self.profiler.record('DataObj.'+name,int(val))
+ 
+        return self.performance()
+ 
+    def isolated_around(self,periods,P):
+        # number of isolated lectures in the periods next to and including P. A lecture is isolated when
+        # the curriculum has no lecture in an adjacent period of the day
+        count = 0
+        for p in range(max(P-1,0),min(P+2,self.nPeriods)):
+            if periods[p] and not (p>0 and periods[p-1]) and not (p<self.nPeriods-1 and periods[p+1]):
+                count += 1
+        return count
+ 
+    def delta_components(self,entry,c_nr):
+        # change in the objective components when lecture c_nr is moved from the unscheduled list to the free entry.
+        # Uses the maintained state, so the cost is proportional to the number of curricula of the course
         D,P,R = entry
+        c_nr = int(c_nr)
  
-        # unscheduled
-        unscheduled_val = -1 # 1 item is removed from the unscheduled list
+        # unscheduled: 1 item is removed from the unscheduled list
+        unscheduled_val = -1
  
         # room capacity
-        room_cap = self.rooms.loc[R,'Capacity']
-        nr_stud = self.courses.loc[c_nr,'Number_of_students']
-        room_overflow = nr_stud-room_cap
-        room_cap_val = 0
-        if room_overflow>0:
-            room_cap_val=room_overflow
- 
+        room_cap_val = self.tables.overflow[c_nr,R]
  
         # minimum working days
-        distinct_days = set(np.argwhere(self.solution==c_nr)[:,0])
-        min_work_days = self.courses.loc[c_nr,'Minimum_working_days']
-        diff = min_work_days-len(distinct_days)
- 
-        if D in distinct_days:
-            min_work_val = 0
-        else:
-            if diff>0:
-                min_work_val=-1
+        min_work_val = 0
+        if self.course_day_count[c_nr,D]==0 and self.course_days_used[c_nr]<self.tables.min_days[c_nr]:
+            min_work_val = -1
  
         # room stability
-        distinct_rooms = set(np.argwhere(self.solution==c_nr)[:,2])
-        if R in distinct_rooms:
-            room_stab_val = 0
-        else:
-            if len(distinct_rooms)>0:
-                room_stab_val = 1
+        room_stab_val = 0
+        if self.course_room_count[c_nr,R]==0 and self.course_rooms_used[c_nr]>0:
+            room_stab_val = 1
  
         # curriculum compactness
-        c_name = self.courses.loc[c_nr,'Course']
-        curricula = self.course2curr[c_name]
- 
         curr_compact_val = 0
-        # loop over all curricula for the given course
-        for curr in curricula:
-            # get the courses in the given curricula
-            curr_courses = self.curr2course[curr]
- 
-            # create boolean array indicating where courses
-            bool_array = np.zeros(self.solution[D,:,:].shape,dtype=bool)
-            for c_name in curr_courses:
-                c_nr = np.argwhere(self.courses.Course==c_name)[0][0]
-                bool_array+=(self.solution[D,:,:]==c_nr)
- 
-            curr_periods = np.argwhere(bool_array==True)[:,0]
-            curr_periods = np.append(curr_periods,P)
-            if P==0:
-                if P+1 not in curr_periods:
-                    curr_compact_val+=1
-            if P==(self.nPeriods-1):
-                if P-1 not in curr_periods:
-                    curr_compact_val+=1
-            else:
-                if P-1 not in curr_periods or P+1 not in curr_periods:
-                    curr_compact_val+=1
+        for curr_nr in self.tables.course_curr[c_nr]:
+            periods = self.curr_period_count[curr_nr,D]
+            before = self.isolated_around(periods,P)
+            periods[P] += 1
+            curr_compact_val += self.isolated_around(periods,P)-before
+            periods[P] -= 1
  
-        # delta evaluation
-        delta_val = (self.unscheduled_penal*unscheduled_val +
-                   self.room_cap_penal*room_cap_val +
-                   self.min_work_penal*min_work_val +
-                   self.curr_compact_penal*curr_compact_val +
-                   self.room_stab_penal*room_stab_val)
+        return np.array([unscheduled_val,room_cap_val,min_work_val,curr_compact_val,room_stab_val])
  
-        return delta_val
+    def delta_eval(self,entry,c_nr):
+        # change in objective when lecture c_nr is moved from the unscheduled list to the free entry
+        return int(self.penalties@self.delta_components(entry,c_nr))
+ 
+    def delta_eval_all(self,c_nr):
+        # feasibility and change in objective of inserting lecture c_nr in every (day, period, room) entry at once,
+        # as two arrays shaped like the solution. Same terms as delta_components, computed per day, period and room
+        # and broadcast: the deltas of infeasible entries are not meaningful
+        t = self.tables
+        c_nr = int(c_nr)
+        unscheduled_pen,room_cap_pen,min_work_pen,curr_compact_pen,room_stab_pen = self.penalties
+ 
+        blocked = t.unavailable[c_nr] | (self.course_period_count[c_nr]>0) | (self.lecturer_period_count[t.lecturer[c_nr]]>0)
+ 
+        # curriculum compactness: a new lecture in an empty period is isolated if both neighbour periods are empty,
+        # and takes away the isolation of a neighbour that was isolated
+        curr_compact = np.zeros((self.nDays,self.nPeriods),dtype=int)
+        curricula = t.course_curr[c_nr]
+        if len(curricula)>0:
+            curr_periods = self.curr_period_count[curricula]
+            blocked = blocked | (curr_periods>0).any(axis=0)
+            occupied = np.pad(curr_periods>0,((0,0),(0,0),(2,2)))
+            mid = occupied[:,:,2:-2]
+            left,right = occupied[:,:,1:-3],occupied[:,:,3:-1]
+            left_isolated = left & ~occupied[:,:,:-4]
+            right_isolated = right & ~occupied[:,:,4:]
+            curr_compact = np.where(mid,0,(~left & ~right).astype(int)-left_isolated-right_isolated).sum(axis=0)
+ 
+        min_work = -((self.course_day_count[c_nr]==0) & (self.course_days_used[c_nr]<t.min_days[c_nr])).astype(int)
+        room_stab = ((self.course_room_count[c_nr]==0) & (self.course_rooms_used[c_nr]>0)).astype(int)
+ 
+        deltas = (-unscheduled_pen + curr_compact_pen*curr_compact[:,:,None] + min_work_pen*min_work[:,None,None]
+                  + room_cap_pen*t.overflow[c_nr][None,None,:] + room_stab_pen*room_stab[None,None,:])
+        feasible = (self.solution==self.EMPTY) & ~blocked[:,:,None]
+        return feasible, deltas
+ 
+    def update_state(self,entry,c_nr,sign):
+        # add (sign=1) or remove (sign=-1) a lecture in the state counters and the free entries
+        D,P,R = entry
+        self.course_day_count[c_nr,D] += sign
+        self.course_room_count[c_nr,R] += sign
+        self.curr_period_count[self.tables.course_curr[c_nr],D,P] += sign
+        self.course_period_count[c_nr,D,P] += sign
+        self.lecturer_period_count[self.tables.lecturer[c_nr],D,P] += sign
+        if sign>0:
+            self.free_slots.remove(entry)
+        else:
+            self.free_slots.add(entry)
+        self.course_days_used[c_nr] = np.count_nonzero(self.course_day_count[c_nr])
+        self.course_rooms_used[c_nr] = np.count_nonzero(self.course_room_count[c_nr])
  
     def insert(self,entry,c_nr):
-        # insert entry in solution
+        # insert entry in solution and return the change in objective
         D,P,R = entry
-        self.solution[D,P,R] = c_nr
+        c_nr = int(c_nr)
+        delta = self.delta_components(entry,c_nr)
         # remove entry from unscheduled list
-        self.unscheduled.remove(self.unscheduled.index(c_nr))
+        self.unscheduled.remove(c_nr)
+        self.solution[D,P,R] = c_nr
+        self.placement[self.lecture_of(c_nr,self.EMPTY)] = D,P,R
+        self.update_state(entry,c_nr,1)
+        self.components += delta
+        delta_val = int(self.penalties@delta)
+        self.obj_val += delta_val
  
-        return self.delta_eval(entry,c_nr)
+        return delta_val
  
     def remove(self,entry):
+        # remove entry from solution and return the change in objective
         D,P,R = entry
-        c_nr = self.solution[D,P,R]
+        c_nr = int(self.solution[D,P,R])
         self.unscheduled.append(c_nr)
-        self.solution[D,P,R] = np.nan
+        self.solution[D,P,R] = self.EMPTY
+        self.placement[self.lecture_of(c_nr,D,P,R)] = self.EMPTY
+        self.update_state(entry,c_nr,-1)
+        delta = self.delta_components(entry,c_nr)
+        self.components -= delta
+        delta_val = int(self.penalties@delta)
+        self.obj_val -= delta_val
+ 
+        return -delta_val
+ 
+    def lecture_of(self,c_nr,D,P=None,R=None):
+        # lecture of course c_nr placed in entry (D,P,R), or an unscheduled one when D is EMPTY
+        first = self.tables.first_lecture[c_nr]
+        for lecture in range(first,first+self.tables.n_lectures[c_nr]):
+            if self.placement[lecture,0]==D and (D==self.EMPTY or (self.placement[lecture,1]==P and self.placement[lecture,2]==R)):
+                return lecture
+ 
+    def state_arrays(self):
+        return (self.solution,self.placement,self.course_day_count,self.course_room_count,self.curr_period_count,self.course_period_count,
+                self.lecturer_period_count,self.course_days_used,self.course_rooms_used,self.components)
+ 
+    def snapshot(self):
+        # copies of the solution, placement and state arrays, all small integer arrays
+        return tuple(a.copy() for a in self.state_arrays()), list(self.unscheduled), self.obj_val
+ 
+    def restore(self,snapshot):
+        # copy a snapshot back into the arrays in place
+        for a,saved in zip(self.state_arrays(),snapshot[0]):
+            np.copyto(a,saved)
+        self.unscheduled = list(snapshot[1])
+        self.obj_val = snapshot[2]
+        self.free_slots.rebuild(self.solution==self.EMPTY)
+ 
+    def scheduled_entries(self):
+        return np.argwhere(self.solution!=self.EMPTY)
+ 
+    # destroy operators: remove lectures from the solution and return the change in objective
  
-        return self.delta_eval(entry,c_nr)
-
     def RandDestroy(self, sol, no_of_destroys=1):
-        for i in range(no_of_destroys):
-            while True:
-                D, P, R = np.random.randint(0, self.nDays), np.random.randint(0, self.nPeriods), np.random.randint(0, self.nRooms)
-                if ~np.isnan(sol[D,P,R]):
-                    self.remove([D,P,R])
-                    break
-                
-     def print_solution(self):
+        delta_val = 0
+        entries = self.scheduled_entries()
+        np.random.shuffle(entries)
+        for D,P,R in entries[:no_of_destroys]:
+            delta_val += self.remove([D,P,R])
+        return delta_val
+ 
+    def WorstDestroy(self, sol, no_of_destroys=1, randomness=3):
+        # remove the lectures that save the most when taken out, with some randomness in the order
+        entries = self.scheduled_entries()
+        savings = []
+        for entry in entries:
+            c_nr = self.solution[tuple(entry)]
+            savings.append(-self.remove(entry))
+            self.insert(entry,int(c_nr))
+        order = list(entries[np.argsort(savings)[::-1]])
+        delta_val = 0
+        for i in range(min(no_of_destroys,len(order))):
+            D,P,R = order.pop(int(len(order)*np.random.random()**randomness))
+            delta_val += self.remove([D,P,R])
+        return delta_val
+ 
+    def RelatedDestroy(self, sol, no_of_destroys=1):
+        # remove lectures of courses sharing a curriculum with a random scheduled lecture
+        entries = self.scheduled_entries()
+        if len(entries)==0:
+            return 0
+        D,P,R = entries[np.random.randint(len(entries))]
+        curricula = self.tables.course_curr[int(self.solution[D,P,R])]
+        if len(curricula)==0:
+            return self.RandDestroy(sol,no_of_destroys)
+        curr_courses = self.tables.curr_course[curricula[np.random.randint(len(curricula))]]
+        related = np.isin(self.solution[tuple(entries.T)],curr_courses)
+        related_entries = entries[related]
+        np.random.shuffle(related_entries)
+        delta_val = 0
+        for D,P,R in related_entries[:no_of_destroys]:
+            delta_val += self.remove([D,P,R])
+        if len(related_entries)<no_of_destroys:
+            delta_val += self.RandDestroy(sol,no_of_destroys-len(related_entries))
+        return delta_val
+ 
+    def DayDestroy(self, sol, no_of_destroys=1):
+        # remove every lecture of a random day
+        D = np.random.randint(self.nDays)
+        delta_val = 0
+        for P,R in np.argwhere(self.solution[D,:,:]!=self.EMPTY):
+            delta_val += self.remove([D,P,R])
+        return delta_val
+ 
+    # repair operators: insert unscheduled lectures and return the change in objective
+ 
+    def insertion_costs(self,c_nr):
+        # delta of every feasible free entry for lecture c_nr, as (entries, deltas) sorted by delta
+        entries = self.feasible_entries(c_nr)
+        deltas = self.delta_eval_all(c_nr)[1][tuple(entries.T)]
+        order = np.argsort(deltas,kind='stable')
+        return entries[order], deltas[order]
+ 
+    def GreedyRepair(self, sol):
+        # insert the unscheduled lectures one at a time in random order at their cheapest feasible entry
+        delta_val = 0
+        lectures = list(self.unscheduled)
+        np.random.shuffle(lectures)
+        for c_nr in lectures:
+            entries, deltas = self.insertion_costs(c_nr)
+            if len(entries)>0 and deltas[0]<0:
+                delta_val += self.insert(entries[0],c_nr)
+        return delta_val
+ 
+    def RegretRepair(self, sol, k=2):
+        # insert the lecture with the largest regret (cost of not getting its best entry) first.
+        # Lectures with fewer than k feasible entries get priority, fewest entries first.
+        # Insertion costs are cached per course and only recomputed for courses related to the last insertion
+        delta_val = 0
+        costs = dict()
+        while len(self.unscheduled)>0:
+            best = None
+            for c_nr in set(self.unscheduled):
+                if c_nr not in costs:
+                    costs[c_nr] = self.insertion_costs(c_nr)
+                entries, deltas = costs[c_nr]
+                if len(entries)==0 or deltas[0]>=0:
+                    continue
+                if len(deltas)<k:
+                    regret = np.inf, -len(deltas)
+                else:
+                    regret = float(np.sum(deltas[1:k]-deltas[0])), 0
+                if best is None or regret>best[0]:
+                    best = regret, entries[0], c_nr
+            if best is None:
+                break
+            _, entry, c_nr = best
+            delta_val += self.insert(entry,c_nr)
+ 
+            # courses sharing the lecturer or a curriculum may change feasibility or compactness on that day
+            related = set(self.tables.course_curr[c_nr])
+            lecturer = self.tables.lecturer[c_nr]
+            for other in list(costs.keys()):
+                if other==c_nr or self.tables.lecturer[other]==lecturer or related.intersection(self.tables.course_curr[other]):
+                    del costs[other]
+                else:
+                    keep = (costs[other][0]!=entry).any(axis=1)
+                    costs[other] = costs[other][0][keep], costs[other][1][keep]
+        return delta_val
+ 
+    def print_solution(self):
         f = open("solution.sol", "w")
         performance=self.solution_eval()
         f.write("Objective "+str(performance[0])+"\n")
@@ -318,6 +493,6 @@ class DataObj:
         for day_idx,day in enumerate(self.solution):
             for period_idx,period in enumerate(day):
                 for room_idx,room in enumerate(period):
-                    if ~np.isnan(room):
-                        outputStr=self.courses.loc[int(room)].Course+" "+str(day_idx)+" "+str(period_idx)+" "+self.rooms.loc[room_idx].Room
+                    if room!=self.EMPTY:
+                        outputStr=self.courses.loc[int(room)].Course+" "+str(day_idx)+" "+str(period_idx)+" "+str(self.rooms.loc[room_idx].Room)
                         f.write(outputStr+"\n")
\ No newline at end of file
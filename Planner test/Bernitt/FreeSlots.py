@@ -0,0 +1,35 @@
+import numpy as np
+
+class FreeSlots:
+
+    def __init__(self,shape):
+        # index of the free (day, period, room) entries of the solution matrix. Entries are kept in a list with
+        # their position stored in a matrix, so removing (swap with the last entry) and adding are O(1)
+        self.shape = shape
+        self.where = -np.ones(shape,dtype=int)
+        self.slots = np.zeros((int(np.prod(shape)),3),dtype=int)
+        self.size = 0
+
+    def rebuild(self,free):
+        # rebuild the index from a boolean matrix of free entries
+        slots = np.argwhere(free)
+        self.size = len(slots)
+        self.slots[:self.size] = slots
+        self.where[:] = -1
+        self.where[tuple(slots.T)] = np.arange(self.size)
+
+    def remove(self,entry):
+        i = self.where[tuple(entry)]
+        last = self.slots[self.size-1].copy()
+        self.slots[i] = last
+        self.where[tuple(last)] = i
+        self.where[tuple(entry)] = -1
+        self.size -= 1
+
+    def add(self,entry):
+        self.slots[self.size] = entry
+        self.where[tuple(entry)] = self.size
+        self.size += 1
+
+    def entries(self):
+        return self.slots[:self.size]
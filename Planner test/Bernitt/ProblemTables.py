@@ -0,0 +1,52 @@
+import numpy as np
+
+class ProblemTables:
+
+    def __init__(self,data):
+        # compiled, read only arrays of the problem, built once from the data frames read by DataObj.readfiles,
+        # so the hot paths only use integer indexing
+        courses = data.courses
+        self.nCourses = len(courses)
+        self.nRooms = len(data.rooms)
+        self.nDays = int(data.basic['Days'][0])
+        self.nPeriods = int(data.basic['Periods_per_day'][0])
+
+        # courses
+        self.course_names = list(courses.Course)
+        self.course_index = {c_name: c_nr for c_nr,c_name in enumerate(self.course_names)}
+        self.lecturer_names = list(dict.fromkeys(courses.Lecturer))
+        lecturer_index = {l: i for i,l in enumerate(self.lecturer_names)}
+        self.lecturer = np.array([lecturer_index[l] for l in courses.Lecturer],dtype=int)
+        self.students = courses.Number_of_students.values.astype(int)
+        self.min_days = courses.Minimum_working_days.values.astype(int)
+        self.n_lectures = courses.Number_of_lectures.values.astype(int)
+        # lectures are numbered course by course, so the lectures of course c are first_lecture[c]:first_lecture[c]+n_lectures[c]
+        self.first_lecture = np.concatenate(([0],np.cumsum(self.n_lectures)[:-1])).astype(int)
+
+        # rooms, and the overflow of every course in every room
+        self.capacity = data.rooms.Capacity.values.astype(int)
+        self.overflow = np.maximum(self.students[:,None]-self.capacity[None,:],0)
+
+        # course x curriculum incidence in compressed sparse row form, both ways
+        self.curr_names = list(dict.fromkeys(list(data.curricula.Curriculum)+list(data.relation.Curriculum)))
+        self.curr_index = {curr: curr_nr for curr_nr,curr in enumerate(self.curr_names)}
+        self.nCurricula = len(self.curr_names)
+        pairs = np.array([(self.course_index[c],self.curr_index[q]) for q,c in zip(data.relation.Curriculum,data.relation.Course) if c in self.course_index],dtype=int).reshape(-1,2)
+        pairs = np.unique(pairs,axis=0)
+        self.course_curr_ptr = np.searchsorted(pairs[:,0],np.arange(self.nCourses+1))
+        self.course_curr_idx = pairs[:,1].copy()
+        pairs = pairs[np.lexsort((pairs[:,0],pairs[:,1]))]
+        self.curr_course_ptr = np.searchsorted(pairs[:,1],np.arange(self.nCurricula+1))
+        self.curr_course_idx = pairs[:,0].copy()
+        self.course_curr = [self.course_curr_idx[self.course_curr_ptr[c]:self.course_curr_ptr[c+1]] for c in range(self.nCourses)]
+        self.curr_course = [self.curr_course_idx[self.curr_course_ptr[q]:self.curr_course_ptr[q+1]] for q in range(self.nCurricula)]
+
+        # course x day x period unavailability mask
+        self.unavailable = np.zeros((self.nCourses,self.nDays,self.nPeriods),dtype=bool)
+        u = data.unavailability_table
+        known = u.Course.isin(self.course_index.keys()).values
+        self.unavailable[[self.course_index[c] for c in u.Course[known]],u.Day.values[known].astype(int),u.Period.values[known].astype(int)] = True
+
+        for a in (self.lecturer,self.students,self.min_days,self.n_lectures,self.first_lecture,self.capacity,self.overflow,self.course_curr_ptr,
+                  self.course_curr_idx,self.curr_course_ptr,self.curr_course_idx,self.unavailable):
+            a.setflags(write=False)
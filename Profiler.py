@@ -0,0 +1,82 @@
+import json
+import time
+from contextlib import contextmanager
+
+
+class Timed:
+
+    def __init__(self, profiler, name, fn):
+        #A method wrapped by Profiler.instrument. A class instead of a closure so instrumented objects can still be pickled
+        self.profiler = profiler
+        self.name = name
+        self.fn = fn
+
+    def __call__(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self.fn(*args, **kwargs)
+        finally:
+            self.profiler.add(self.name, time.perf_counter()-start)
+
+
+class Profiler:
+
+    def __init__(self, verbose=False):
+        #Opt in call counts, cumulative times and rejection reasons for Solver, LocalSearch, DataObj and ALNS.
+        #Without a profiler nothing is recorded. instrument only wraps the methods of the object it is given,
+        #so code that is not profiled runs unchanged. With verbose the recorded values are also printed
+        self.verbose = verbose
+        self.calls = dict()
+        self.seconds = dict()
+        self.rejections = dict()   #Per check: reason -> count
+        self.values = dict()
+
+    def add(self, name, seconds=0.0, calls=1):
+        self.calls[name] = self.calls.get(name, 0) + calls
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    def instrument(self, obj, methods, prefix=None):
+        #Replace the methods of obj by timed versions, counted as '<prefix>.<method>'. prefix defaults to the class name
+        prefix = prefix or type(obj).__name__
+        for method in methods:
+            setattr(obj, method, Timed(self, f'{prefix}.{method}', getattr(obj, method)))
+        return obj
+
+    def wrap(self, name, fn):
+        return Timed(self, name, fn)
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter()-start)
+
+    def reject(self, check, reason, count=1):
+        reasons = self.rejections.setdefault(check, dict())
+        reasons[reason] = reasons.get(reason, 0) + count
+
+    def record(self, name, value):
+        #Last value of a quantity, e.g. an objective component
+        self.values[name] = value
+        if self.verbose:
+            print(f"{name}: {value}")
+
+    def report(self):
+        return {'calls': dict(self.calls),
+                'seconds': dict(self.seconds),
+                'mean_us': {name: 1e6*self.seconds[name]/self.calls[name] for name in self.calls if self.calls[name] > 0},
+                'rejections': {check: dict(reasons) for check, reasons in self.rejections.items()},
+                'values': dict(self.values)}
+
+    def to_json(self, filename):
+        with open(filename, 'w') as f:
+            json.dump(self.report(), f, indent=1, default=float)
+
+    def summary(self):
+        print(f"{'':40s}{'calls':>10s}{'seconds':>10s}{'us/call':>10s}")
+        for name in sorted(self.calls, key=lambda n: -self.seconds[n]):
+            print(f"{name:40s}{self.calls[name]:10d}{self.seconds[name]:10.3f}{1e6*self.seconds[name]/max(self.calls[name], 1):10.1f}")
+        for check, reasons in self.rejections.items():
+            print(f"{check} rejections: " + ", ".join(f"{reason} {count}" for reason, count in sorted(reasons.items(), key=lambda r: -r[1])))
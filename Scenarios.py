@@ -0,0 +1,101 @@
+import argparse
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+
+import dataReader
+import Solver
+from Calendar import Calendar
+from LocalSearch import LocalSearch
+from ParallelSolver import make_pool, _shared
+
+
+def _run_scenario(scenario):
+    return _shared['runner'].evaluate(_shared['data_reader'], scenario)
+
+
+class ScenarioRunner:
+
+    def __init__(self, mode='optimize', time_limit=10, weights=None, calendar=None, processes=1, seed=0):
+        #Plans what-if variants of one loaded input set and compares them. A scenario is a dict with a name and any of
+        #add_meetings, remove_ids and add_unavailability (as in dataReader.apply_changes) and day_start / day_end (hours)
+        #to change the working hours of the calendar. Every scenario is planned from the base data with Solver.Solve in
+        #the given mode and seed, and the base data itself is never changed. With processes > 1 the scenarios are
+        #planned in a process pool that gets the base data once
+        self.mode = mode
+        self.time_limit = time_limit
+        self.weights = weights
+        self.calendar = Calendar() if calendar is None else calendar
+        self.processes = processes
+        self.seed = seed
+        self.solutions = dict()
+
+    def scenario_calendar(self, scenario):
+        base = self.calendar
+        return Calendar(base.start, base.weeks, base.days, scenario.get('day_start', base.day_start),
+                        scenario.get('day_end', base.day_end), base.holidays)
+
+    def evaluate(self, data_reader, scenario):
+        #Plan one scenario and return its row of the comparison table and its plan (None if it could not be planned).
+        #The objective is the soft cost of LocalSearch, so it can be compared between modes
+        data = data_reader.overlay(scenario.get('add_meetings'), scenario.get('remove_ids', ()), scenario.get('add_unavailability'))
+        solver = Solver.Solver(calendar=self.scenario_calendar(scenario))
+        np.random.seed(self.seed)
+        start = time.perf_counter()
+        sol = solver.Solve(data, mode=self.mode, time_limit=self.time_limit, weights=self.weights)
+        seconds = time.perf_counter() - start
+        feasible = sol is not None and solver.check_feasibility(sol, data)
+        objective = LocalSearch(solver.get_state(sol, data), self.weights).objective if feasible else np.nan
+        return {'scenario': scenario['name'], 'meetings': data.num_meetings, 'feasible': bool(feasible),
+                'objective': float(objective), 'seconds': seconds}, sol
+
+    def run(self, data_reader, scenarios, base=True):
+        #Comparison table of feasibility, objective and solve time with one row per scenario, the unchanged data first
+        #when base is set. The plans are kept in self.solutions by scenario name
+        scenarios = ([{'name': 'base'}] if base else []) + [dict(s, name=s.get('name', f'scenario {i+1}')) for i, s in enumerate(scenarios)]
+        if self.processes > 1:
+            data_reader.get_occupancy(self.calendar)   #Built once in the parent instead of in every worker
+            with make_pool(self.processes, {'runner': self, 'data_reader': data_reader}) as pool:
+                results = pool.map(_run_scenario, scenarios, chunksize=1)
+        else:
+            results = [self.evaluate(data_reader, s) for s in scenarios]
+        self.solutions = {row['scenario']: sol for row, sol in results}
+        return pd.DataFrame([row for row, _ in results])
+
+
+def read_scenarios(filename):
+    #Scenarios from a json list. add_meetings and add_unavailability are Excel files in the same layout as the input,
+    #relative to the json file. Example: [{"name": "extra meetings", "add_meetings": "new.xlsx"},
+    #{"name": "AB away", "add_unavailability": "away.xlsx"}, {"name": "short days", "day_start": 9, "day_end": 16}]
+    folder = os.path.dirname(os.path.abspath(filename))
+    with open(filename) as f:
+        scenarios = json.load(f)
+    for s in scenarios:
+        if 'add_meetings' in s:
+            s['add_meetings'] = pd.read_excel(os.path.join(folder, s['add_meetings']))
+        if 'add_unavailability' in s:
+            s['add_unavailability'] = pd.read_excel(os.path.join(folder, s['add_unavailability']), usecols="A:E")
+    return scenarios
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Plan what-if scenarios of one input set and compare them')
+    parser.add_argument('files', nargs=3, help='the meeting, person and unavailability Excel files')
+    parser.add_argument('scenarios', help='json file with the scenarios, see read_scenarios')
+    parser.add_argument('--mode', default='optimize')
+    parser.add_argument('--time-limit', type=float, default=10, help='seconds per scenario')
+    parser.add_argument('--processes', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cache-dir', help='cache the input data here, see dataReader.read_data')
+    parser.add_argument('--csv', help='write the comparison table to this file')
+    args = parser.parse_args()
+
+    data_reader = dataReader.dataReader()
+    data_reader.read_data(args.files, cache_dir=args.cache_dir)
+    runner = ScenarioRunner(mode=args.mode, time_limit=args.time_limit, processes=args.processes, seed=args.seed)
+    table = runner.run(data_reader, read_scenarios(args.scenarios))
+    print(table.to_string(index=False))
+    if args.csv:
+        table.to_csv(args.csv, index=False)
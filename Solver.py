@@ -1,145 +1,418 @@
 import numpy as np
-import datetime
+import queue
+import threading
+import time
 import pandas as pd
 pd.options.mode.chained_assignment = None  # default='warn'
 
-from datetime import date
+from Calendar import Calendar
+from MeetingProblem import MeetingProblem
+from SolverState import SolverState
+from LocalSearch import LocalSearch
+from ExactSolver import ExactSolver
 
 #np.random.seed(42)
 
 class Solver:
 
-    def __init__(self):
-        #self.weeks_left_of_year = datetime.date(datetime.date.today().isocalendar()[0],12,28).isocalendar()[1] - datetime.date.today().isocalendar()[1]  # According to the same ISO specification, January 4th is always going to be week 1 of a given year. By the same calculation, the 28th of December is then always in the last week of the year
-        self.weeks_in_year = 52
-        self.days_to_plan = 4    #How many days we have to plan on (including day 0) so 5 days is 4 here
-        self.day_start = 8       #At what time the day starts
-        self.day_end = 18        #At what time the day ends
-        self.time_slots_per_day = (self.day_end-self.day_start)*4  #How many timeslots we have, in quarters after day start until day end.
+    def __init__(self, profiler=None, calendar=None):
+        #The calendar gives the weeks, working days, hours and holidays to plan in. The default plans in the ISO weeks
+        #of next year, Monday to Friday from 8 to 18. Week, Day and Kvarter of a solution count from its start, see Calendar
+        self.calendar = Calendar() if calendar is None else calendar
+        self.problem = None      #Compiled MeetingProblem, see get_problem
+        self.problem_key = None
 
-    def Solve(self, data_reader):
+        #Optional Profiler, times the main steps and counts why plans are rejected
+        self.profiler = profiler
+        if profiler is not None:
+            profiler.instrument(self, ['random_solution', 'check_feasibility', 'solve_constructive', 'place_series',
+                                       'least_blocked_placement', 'count_options', 'replan', 'solve_component'])
+
+    def Solve(self, data_reader, mode='random', time_limit=10, weights=None):
         #Get a random initial solution with day of the year first and timeslot of that day. Shape = (num_meetings, 3)
         #Solution shape is (Week from today week, day of the week, time slot of the day)
 
+        #mode='constructive' places the meetings one series at a time instead of drawing whole random plans.
+        #mode='optimize' improves the constructive plan for time_limit seconds under the soft constraints of LocalSearch.
+        #mode='exact' solves a CP-SAT model for up to time_limit seconds, see ExactSolver (needs OR-Tools)
+        if mode == 'constructive':
+            return self.solve_constructive(data_reader)
+        if mode == 'optimize':
+            return self.solve_optimize(data_reader, time_limit, weights)
+        if mode == 'exact':
+            return self.solve_exact(data_reader, time_limit, weights)
+
         feasible = False
         count = 0
         while feasible == False:
-            if count % 100 == 0 :
-                print(count)
-
             sol = self.random_solution(data_reader)
 
             #Check feasibility of solution
             feasible = self.check_feasibility(sol, data_reader)
 
             if feasible == True:
-                print(f"{count} solution was chekced before a solution was found")
-                #print("Solution is feasible!")
+                if self.profiler is not None:
+                    self.profiler.record('Solver.random attempts', count+1)
                 return sol
             else:
                 count += 1
-                #print("Solution was not feasible")
 
 
         #return feasible, error
 
     def random_solution(self, data_reader):
+        #Random week per series and random day and time slot per meeting. The later meetings of a recurring series
+        #follow the first one with the interval of the series, see MeetingProblem.series_weeks
+        problem = self.get_problem(data_reader)
+        first_week = np.floor(np.random.random(len(problem.series_first))*problem.last_first_week()).astype(int) + 1
+        times = pd.DataFrame({'Week': problem.series_weeks(first_week),
+                              'Day': np.random.randint(1, problem.days+1, size=problem.num_meetings),  #adding a day to the solution so day 1 equals monday
+                              'Kvarter': np.random.randint(0, problem.quarters, size=problem.num_meetings)})
+        return pd.concat([data_reader.m_data.reset_index(drop=True), times], axis=1)
 
-        sol = np.round(np.random.random(size=(data_reader.num_meetings,3))*np.array((self.weeks_in_year-1, self.days_to_plan, self.time_slots_per_day-1))).astype(int) + np.array((1,1,0)) #adding a day to the solution so day 1 equals monday. Minus 1 as no meeting is shorter than or equal to 15 min
-        times = pd.DataFrame(sol)
-        times.columns = ['Week', 'Day', 'Kvarter']
-        sol = pd.concat([data_reader.m_data.reset_index(drop=True),times.reset_index(drop=True)], axis=1)
-        # Get unique meeting type ids
-        unique_ids = list(set(sol.ID.values))
-        id_idx = []
-        # Get first index of unique ids
-        for id in unique_ids:
-            id_idx.append(sol.ID.values.searchsorted(id, side='left'))
-        # ignore rows with NAN in days between
-        for i in range(len(sol)):
-            if sol.num_meetings.values[i] == 1 or np.isnan(sol.days_between.values[i]):
-                continue
-        # If we are at a row where we see an ID for the first time, set the curr_idx to that index
-            if i in id_idx:
-                curr_idx = i
-                continue
-        # If we dont see it for the first time, set i week of that row to the week for curr_idx plus the distance to this instance
-            else:
-                #print(sol.Week.iloc[curr_idx])
-                sol.Week.iloc[i] = int(sol.Week.iloc[curr_idx] + (i-curr_idx)*int(data_reader.unique_dict[sol.ID.iloc[i]][0]))
+    def solve_constructive(self, data_reader, max_ejections=10, ejection_samples=20, initial=None):
+        #Place one meeting series at a time into a grid of free quarters per person, most constrained series first.
+        #If a series does not fit, the placed series blocking the least attractive slot are ejected and put back in the queue.
+        #initial is a placement per series, or None, to start from. Initial placements that still fit are kept
+        problem = self.get_problem(data_reader)
+        series = problem.series
+        self.failure = None
+        grid = problem.unavailable.copy()       # (persons, weeks, days, quarters), True = busy: unavailability plus booked meetings
+
+        placements = [None]*len(series)
+        for i, placement in enumerate(initial or ()):
+            if placement is not None and self.fits(grid, series[i], placement):
+                placements[i] = placement
+                self.book(grid, series[i], placement, True)
+        self.placed = [i for i in range(len(series)) if placements[i] is None]   #Series placed by this call
+
+        #Most constrained first: fewest start options when only looking at unavailability
+        options = np.zeros(len(series), dtype=int)
+        for i in self.placed:
+            options[i] = self.count_options(problem.series_starts(i), series[i])
+            if options[i] == 0:
+                return self.fail('no free slot', f"Meeting {series[i]['ID']} has no free slot for its participants")
+        pending = sorted(self.placed, key=lambda i: (options[i], -series[i]['length']*len(series[i]['rows'])))
+
+        ejections = np.zeros(len(series), dtype=int)
+        while pending:
+            i = pending.pop(0)
+            s = series[i]
+            placement = self.place_series(grid[s['persons']].any(axis=0), s)
+            if placement is None:
+                #Local backtracking: find a slot that only clashes with a few placed series and eject those
+                placement, blockers = self.least_blocked_placement(i, placements, ejection_samples)
+                if placement is None:
+                    return self.fail('no placement', f"Meeting {s['ID']} does not fit in the calendar without overlapping itself")
+                for b in blockers:
+                    ejections[b] += 1
+                    if ejections[b] > max_ejections:
+                        return self.fail('ejections', f"Could not place meeting {series[b]['ID']} after {max_ejections} ejections")
+                    self.book(grid, series[b], placements[b], False)
+                    placements[b] = None
+                    pending.insert(0, b)
+                    if b not in self.placed:
+                        self.placed.append(b)
+            placements[i] = placement
+            self.book(grid, s, placement, True)
+
+        times = np.zeros((data_reader.num_meetings, 3), dtype=int)
+        for s, placement in zip(series, placements):
+            times[s['rows']] = np.array(placement) + np.array((1, 1, 0))
+        times = pd.DataFrame(times, columns=['Week', 'Day', 'Kvarter'])
+        sol = pd.concat([data_reader.m_data.reset_index(drop=True), times], axis=1)
+        if not self.check_feasibility(sol, data_reader):
+            return self.fail('infeasible', "The constructed plan is not feasible")
+        return sol
+
+    def fail(self, reason, message):
+        #Why solve_constructive found no plan, kept in self.failure and counted by the profiler. Returns None, the failed plan
+        self.failure = message
+        if self.profiler is not None:
+            self.profiler.reject('Solver.solve_constructive', reason)
+            self.profiler.record('Solver.failure', message)
+        return None
+
+    def solve_stream(self, data_reader, mode='optimize', time_limit=10, max_iterations=None, weights=None, min_interval=0.5, stop=None):
+        #Anytime version of Solve: a generator of dicts with the keys solution, objective, seconds and final for every
+        #better plan, at most one every min_interval seconds and always the final one. The solve stops when time_limit
+        #seconds or max_iterations attempts/moves are used, when stop (e.g. a threading.Event set by another thread) is
+        #set, or when the caller closes the generator (e.g. breaks out of the loop). The latest plan received is the
+        #best so far. The objective is None for the random and constructive modes
+        start = time.perf_counter()
+
+        def result(solution, objective, final=False):
+            return {'solution': solution, 'objective': objective, 'seconds': time.perf_counter()-start, 'final': final}
+
+        def remaining():
+            return None if time_limit is None else max(time_limit-(time.perf_counter()-start), 0)
+
+        def stopped():
+            return stop is not None and stop.is_set()
+
+        if mode == 'random':
+            count = 0
+            while (time_limit is None or remaining() > 0) and (max_iterations is None or count < max_iterations) and not stopped():
+                sol = self.random_solution(data_reader)
+                count += 1
+                if self.check_feasibility(sol, data_reader):
+                    yield result(sol, None, True)
+                    return
+            return
+
+        sol = self.solve_constructive(data_reader)
+        if sol is None:
+            return
+        if mode == 'constructive':
+            yield result(sol, None, True)
+            return
+
+        if mode == 'optimize':
+            self.search = LocalSearch(self.get_state(sol, data_reader), weights, profiler=self.profiler)
+            if remaining() == 0:
+                #The constructive plan used up the time limit
+                yield result(sol, float(self.search.objective), True)
+                return
+            yield result(sol, float(self.search.objective))
+            state = self.search.state
+            search = self.search.iterate(remaining(), max_iterations, stop)
+            last = time.perf_counter()
+            try:
+                for seconds, objective in search:
+                    if time.perf_counter() - last >= min_interval:
+                        yield result(self.plan(data_reader, state.week, state.day, state.kvarter), objective)
+                        last = time.perf_counter()
+            finally:
+                search.close()
+            yield result(self.plan(data_reader, state.week, state.day, state.kvarter), float(self.search.objective), True)
+
+        elif mode == 'exact':
+            #CP-SAT runs in a thread and hands its plans over through a queue
+            self.exact = ExactSolver(self, data_reader, weights, profiler=self.profiler)
+            self.exact.hint(sol)
+            yield result(sol, None)
+            plans = queue.Queue()
+            closed = threading.Event()
+
+            def callback(solution, objective, seconds):
+                plans.put((solution, objective))
+                return closed.is_set() or stopped()
+
+            def run():
+                #The plans come through callback. Ends with None on the queue, or the error if Solve failed
+                outcome = None
+                try:
+                    self.exact.Solve(remaining(), callback=callback)
+                except Exception as error:
+                    outcome = error
+                finally:
+                    plans.put(outcome)
+
+            thread = threading.Thread(target=run)
+            thread.start()
+            best = (sol, None)
+            try:
+                while True:
+                    try:
+                        item = plans.get(timeout=0.1)
+                    except queue.Empty:
+                        if stopped() and hasattr(self.exact, 'cp_solver'):
+                            self.exact.stop()
+                        continue
+                    if isinstance(item, Exception):
+                        raise item
+                    if item is None:
+                        break
+                    best = item
+                    yield result(item[0], item[1])
+            finally:
+                closed.set()
+                if thread.is_alive() and hasattr(self.exact, 'cp_solver'):
+                    self.exact.stop()
+                thread.join()
+            yield result(best[0], best[1], True)
+
+    def plan(self, data_reader, week, day, kvarter):
+        #Solution frame of a plan given as arrays
+        times = pd.DataFrame({'Week': np.array(week, dtype=int), 'Day': np.array(day, dtype=int), 'Kvarter': np.array(kvarter, dtype=int)})
+        return pd.concat([data_reader.m_data.reset_index(drop=True), times], axis=1)
+
+    def solve_optimize(self, data_reader, time_limit=10, weights=None):
+        #Local search on a feasible plan. The search is kept in self.search for its objective and trajectory
+        sol = self.solve_constructive(data_reader)
+        if sol is None:
+            return None
+        self.search = LocalSearch(self.get_state(sol, data_reader), weights, profiler=self.profiler)
+        self.search.Run(time_limit)
+        state = self.search.state
+        sol.Week, sol.Day, sol.Kvarter = state.week, state.day, state.kvarter
+        return sol
+
+    def solve_exact(self, data_reader, time_limit=60, weights=None, warm_start=None):
+        #Exact model warm started from warm_start, or from a constructive plan when none is given.
+        #The model is kept in self.exact
+        self.exact = ExactSolver(self, data_reader, weights, profiler=self.profiler)
+        if warm_start is None:
+            warm_start = self.solve_constructive(data_reader)
+        if warm_start is not None:
+            self.exact.hint(warm_start)
+        return self.exact.Solve(time_limit)
+
+    def replan(self, previous, data_reader, max_ejections=10, ejection_samples=20):
+        #Repair a plan after the data reader was edited, e.g. with dataReader.apply_changes. Meetings keep their time
+        #from the previous plan when it is still free, and only new series and series that now clash are placed again.
+        #The IDs of the series that got a new time are kept in self.moved
+        problem = self.get_problem(data_reader)
+        times = dict()
+        occurrence = previous.groupby('ID').cumcount().values
+        for ID, k, w, d, q in zip(previous.ID.values, occurrence, previous.Week.values, previous.Day.values, previous.Kvarter.values):
+            times[(ID, k)] = (int(w)-1, int(d)-1, int(q))
+
+        initial = []
+        for s in problem.series:
+            placement = [times.get((s['ID'], k)) for k in range(len(s['rows']))]
+            if None in placement or any(placement[k][0] != placement[0][0] + k*s['interval'] for k in range(len(placement))):
+                placement = None
+            initial.append(placement)
+
+        sol = self.solve_constructive(data_reader, max_ejections, ejection_samples, initial)
+        self.moved = [int(problem.series[i]['ID']) for i in self.placed]
         return sol
 
+    def find_components(self, data_reader):
+        #IDs of the meetings in each group of meetings that share no participant with the other groups, largest group first
+        problem = self.get_problem(data_reader)
+        return [np.unique(problem.ids[problem.series_first[c]]) for c in problem.components()]
+
+    def solve_component(self, data_reader, ids, mode='constructive', time_limit=10, weights=None):
+        #Plan only the meetings with the given IDs, see Solve for the modes
+        return self.Solve(data_reader.select_meetings(ids), mode, time_limit, weights)
+
+    def solve_components(self, data_reader, mode='constructive', time_limit=10, weights=None):
+        #Split the meetings into independent groups (see find_components), plan every group on its own and merge the plans.
+        #Many small problems are much faster to plan than one large one. time_limit is shared out over the groups by their
+        #number of meetings. The groups are kept in self.components. See ParallelSolver.solve_components to plan them in parallel
+        self.components = self.find_components(data_reader)
+        solutions = [self.solve_component(data_reader, ids, mode, limit, weights)
+                     for ids, limit in zip(self.components, self.time_shares(data_reader, self.components, time_limit))]
+        return self.merge(data_reader, self.components, solutions)
+
+    def time_shares(self, data_reader, components, time_limit):
+        counts = data_reader.m_data.ID.value_counts()
+        sizes = np.array([counts[ids].sum() for ids in components], dtype=float)
+        return time_limit*sizes/max(sizes.sum(), 1)
+
+    def merge(self, data_reader, components, solutions):
+        #One plan of all the meetings from the plans of the groups, or None if a group could not be planned
+        if any(sol is None for sol in solutions):
+            return None
+        times = np.zeros((data_reader.num_meetings, 3), dtype=int)
+        ids = data_reader.m_data.ID.values
+        for group, sol in zip(components, solutions):
+            times[np.isin(ids, group)] = sol[['Week', 'Day', 'Kvarter']].values
+        return self.plan(data_reader, times[:, 0], times[:, 1], times[:, 2])
+
+    def fits(self, grid, s, placement):
+        #Is the placement of series s inside the calendar and free in the grid
+        weeks, days, quarters = grid.shape[1:]
+        for w, d, q in placement:
+            if not (0 <= w < weeks and 0 <= d < days and 0 <= q and q+s['length'] <= quarters) or grid[s['persons'], w, d, q:q+s['length']].any():
+                return False
+        return True
+
+    def base_weeks(self, starts, s):
+        #First weeks (0-indexed) where every meeting in the series has at least one free start
+        n = len(s['rows'])
+        last = self.calendar.weeks - (n-1)*s['interval']
+        if last <= 0:
+            return np.zeros(0, dtype=int), np.zeros((0, n), dtype=int)
+        weeks = np.arange(last)[:, None] + np.arange(n)[None, :]*s['interval']
+        valid = starts.any(axis=(1, 2))[weeks].all(axis=1)
+        return np.flatnonzero(valid), weeks[valid]
+
+    def count_options(self, starts, s):
+        #Number of placements of series s given the free starts of its meetings
+        _, weeks = self.base_weeks(starts, s)
+        return int(starts.sum(axis=(1, 2))[weeks].min(axis=1).sum()) if len(weeks) > 0 else 0
+
+    def place_series(self, busy, s):
+        #Random placement of a whole series in the free quarters of its participants, or None if it does not fit
+        starts = self.problem.free_starts(busy, s['length'])
+        bases, weeks = self.base_weeks(starts, s)
+        for b in np.random.permutation(len(bases)):
+            trial = busy.copy()
+            placement = []
+            for w in weeks[b]:
+                free = np.argwhere(self.problem.free_starts(trial[w:w+1], s['length'])[0])
+                if len(free) == 0:
+                    break
+                d, q = free[np.random.randint(len(free))]
+                trial[w, d, q:q+s['length']] = True
+                placement.append((int(w), int(d), int(q)))
+            if len(placement) == len(weeks[b]):
+                return placement
+        return None
+
+    def least_blocked_placement(self, i, placements, samples):
+        #Sample placements of series i that respect unavailability only, and return the one clashing with the fewest
+        #placed series. Only the placed neighbours of i in the conflict graph can clash. The meetings of a sample are
+        #booked in a trial grid like in place_series, so they never overlap each other. (None, []) if no sample fits
+        series = self.problem.series
+        s = series[i]
+        busy = self.problem.series_busy(i)
+        bases, weeks = self.base_weeks(self.problem.series_starts(i), s)
+        neighbours = [n for n in self.problem.series_neighbours[i] if placements[n] is not None]
+        best, best_blockers = None, []
+        for b in np.random.permutation(len(bases))[:samples]:
+            trial = busy.copy()
+            placement = []
+            for w in weeks[b]:
+                free = np.argwhere(self.problem.free_starts(trial[w:w+1], s['length'])[0])
+                if len(free) == 0:
+                    break
+                d, q = free[np.random.randint(len(free))]
+                trial[w, d, q:q+s['length']] = True
+                placement.append((int(w), int(d), int(q)))
+            if len(placement) < len(weeks[b]):
+                continue
+            blockers = set()
+            for n in neighbours:
+                for w, d, q in placements[n]:
+                    for w2, d2, q2 in placement:
+                        if w == w2 and d == d2 and q < q2+s['length'] and q2 < q+series[n]['length']:
+                            blockers.add(n)
+            if best is None or len(blockers) < len(best_blockers):
+                best, best_blockers = placement, blockers
+        return best, sorted(best_blockers)
+
+    def book(self, grid, s, placement, value):
+        for w, d, q in placement:
+            grid[s['persons'], w, d, q:q+s['length']] = value
+
+
+
+    def get_problem(self, data_reader):
+        #The compiled problem is built once per data reader and calendar and reused across attempts
+        key = (id(data_reader), data_reader.version, self.calendar.key())
+        if self.problem is None or self.problem_key != key:
+            self.problem = MeetingProblem(data_reader, self)
+            self.problem_key = key
+        return self.problem
+
+    def find_violations(self, solution, data_reader):
+        #All violations of the solution: meetings per constraint type and the overlapping meeting pairs
+        problem = self.get_problem(data_reader)
+        return problem.violations(solution.Week.values, solution.Day.values, solution.Kvarter.values)
 
+    def get_state(self, solution, data_reader):
+        #Incremental state of the solution for move based search, see SolverState.move and SolverState.undo
+        return SolverState(self.get_problem(data_reader), solution.Week.values, solution.Day.values, solution.Kvarter.values)
 
     def check_feasibility(self, solution, data_reader):
-        feasible = True
-        #   For alle møder
-        for i in range(len(solution)):
-
-            #   Check om mødet starter senere end det må
-            if solution.Kvarter.values[i] + solution.duration.values[i]/15 > self.time_slots_per_day:
-                #if solution[i][2]+data_reader.meetings[i].duration/15 > self.time_slots_per_day:
-                #print(f"Meeting {i} is placed too late!")
-                feasible = False
-                return feasible
-
-            #   Check om ugen er gyldig
-            if solution.Week.values[i]  > self.weeks_in_year:
-                #if solution[i][2]+data_reader.meetings[i].duration/15 > self.time_slots_per_day:
-                #print(f"Week of meeting {i} is placed too late!")
-                feasible = False
-                return feasible
-
-            #   Check om personerne der skal deltage er ledige
-            for pers in solution.participants.values[i].split(','): # Hvis der bruges DataFrame som løsning
-            #for pers in data_reader.meetings[i].participants.split(','):
-                if pers in data_reader.time_dict.keys():
-                    for busy_time in data_reader.time_dict[pers]:
-                        #Kan potentielt forbedres ved at ændre i data reader. Læs dato'er ind som dato istedet for tal, og spar et step
-                        busy_start = datetime.datetime.combine(datetime.datetime.fromisocalendar(busy_time[0][0], busy_time[0][1], busy_time[0][2]), busy_time[0][3])
-                        busy_end = datetime.datetime.combine(datetime.datetime.fromisocalendar(busy_time[1][0], busy_time[1][1], busy_time[1][2]), busy_time[1][3])
-
-                        meeting_start = datetime.datetime.fromisocalendar(datetime.datetime.now().year+1, solution.Week.values[i], solution.Day.values[i]) + datetime.timedelta(hours=self.day_start+solution.Kvarter.values[i]/4)  # Hvis der bruges DataFrame som løsning
-                        # meeting_start = datetime.datetime.fromisocalendar(datetime.datetime.now().year+1, solution[i][0], solution[i][1]) + datetime.timedelta(hours=self.day_start+solution[i][2]/4)
-
-                        meeting_end = meeting_start + datetime.timedelta(minutes=int(solution.duration.values[i])) # Hvis der bruges DataFrame som løsning
-                        # meeting_end = meeting_start + datetime.timedelta(minutes=int(data_reader.meetings[i].duration))
-
-                        if busy_start < meeting_start < busy_end or busy_start < meeting_end < busy_end:
-                            feasible = False
-                            #print("Someone in the meeting is busy here")
-                            return feasible
-
-            for j in range(i+1, len(solution)):
-
-                #   Tjek om der er deltagere i møderne der skal være i begge møder
-                if (len(set(solution.participants.values[i].split(',')).intersection(
-                set(solution.participants.values[j].split(',')))) > 0) :
-                #if (len(set(data_reader.meetings[i].participants.split(',')).intersection(
-                #        set(data_reader.meetings[j].participants.split(',')))) > 0):
-
-                    #  Ligger møderne samme uge?
-                    if solution.Week.values[i] == solution.Week.values[j]:
-                    #if solution[i][0] == solution[j][0]:
-
-                        # Ligger møderne samme dag?
-                        if solution.Day.values[i] == solution.Day.values[j]:
-                        #if solution[i][1] <= solution[j][1]:
-
-                            #   Hvis møde "i" start plus møde længde når starten af møde "j"
-                            if solution.Kvarter.values[i] + solution.duration.values[i]/15 <= solution.Kvarter.values[j]:
-                            #if solution[i][2] + data_reader.meetings[i].duration/15 <= solution[j][2]:
-                                feasible = False
-                                return feasible
-                                #print(f"Meeting {i} overlaps meeting {j}")
-
-                        #   Hvis møde "j" starter før møde "i"
-                        else:
-                            #   Hvis møde "j" start plus møde længde når starten af møde "i"
-                            if solution.Kvarter.values[j] + solution.duration.values[j]/15 >= solution.Kvarter.values[i]:
-                            #if solution[j][2] + data_reader.meetings[j].duration/15 >= solution[i][2]:
-                                feasible = False
-                                return feasible
-                                #print(f"Meeting {j} overlaps meeting {i}")
-
-        return feasible
\ No newline at end of file
+        violations = self.find_violations(solution, data_reader)
+        feasible = all(len(v) == 0 for v in violations.values())
+        if not feasible and self.profiler is not None:
+            for kind, v in violations.items():
+                if len(v) > 0:
+                    self.profiler.reject('Solver.check_feasibility', kind)
+        return feasible
@@ -0,0 +1,78 @@
+import numpy as np
+
+
+class SolverState:
+
+    def __init__(self, problem, week, day, kvarter):
+        #Incremental view of a plan for move based search. Keeps the meetings booked per person and day and a running
+        #conflict count, so moving one meeting only looks at the days of its own participants.
+        #A conflict is a meeting outside the calendar, a participant that is unavailable, or two meetings of the same person overlapping
+        self.problem = problem
+        self.week = np.array(week, dtype=int)
+        self.day = np.array(day, dtype=int)
+        self.kvarter = np.array(kvarter, dtype=int)
+        self.booked = [dict() for _ in range(problem.num_persons)]   #Per person: (week, day) -> set of meetings
+        self.history = []
+        self.conflicts = 0
+        for m in range(problem.num_meetings):
+            self.add(m)
+            self.conflicts += self.conflicts_of(m)
+
+    def inside(self, m):
+        p = self.problem
+        return 1 <= self.week[m] <= p.weeks and 1 <= self.day[m] <= p.days and 0 <= self.kvarter[m] and self.kvarter[m] + p.duration[m]/15 <= p.quarters
+
+    def conflicts_of(self, m):
+        #Conflicts involving meeting m where it is placed now
+        p = self.problem
+        if not self.inside(m):
+            conflicts = 1
+        else:
+            conflicts = 0
+            start = p.start_quarters(self.week[m], self.day[m], self.kvarter[m])
+            conflicts += int(np.count_nonzero(p.busy_csum[p.meeting_persons[m], start+p.length[m]] - p.busy_csum[p.meeting_persons[m], start]))
+        end = self.kvarter[m] + p.length[m]
+        for pers in p.meeting_persons[m]:
+            for other in self.booked[pers].get((self.week[m], self.day[m]), ()):
+                if other != m and self.kvarter[other] < end and self.kvarter[m] < self.kvarter[other] + p.length[other]:
+                    conflicts += 1
+        return conflicts
+
+    def add(self, m):
+        key = (self.week[m], self.day[m])
+        for pers in self.problem.meeting_persons[m]:
+            self.booked[pers].setdefault(key, set()).add(m)
+
+    def discard(self, m):
+        key = (self.week[m], self.day[m])
+        for pers in self.problem.meeting_persons[m]:
+            self.booked[pers][key].discard(m)
+
+    def move(self, m, week, day, kvarter):
+        #Move meeting m and return the change in the conflict count. The move can be taken back with undo
+        return self.move_many([(m, week, day, kvarter)])
+
+    def move_many(self, moves):
+        #Move several meetings, given as (meeting, week, day, kvarter), as one step that undo takes back at once
+        self.history.append([(m, self.week[m], self.day[m], self.kvarter[m]) for m, _, _, _ in moves])
+        return sum(self.place(m, week, day, kvarter) for m, week, day, kvarter in moves)
+
+    def shift_series(self, s, weeks):
+        #Move every meeting of series s the given number of weeks, so a recurring series keeps its interval
+        return self.move_many([(m, self.week[m]+weeks, self.day[m], self.kvarter[m]) for m in self.problem.series[s]['rows']])
+
+    def undo(self):
+        #Take back the last move and return the change in the conflict count
+        return sum(self.place(m, week, day, kvarter) for m, week, day, kvarter in reversed(self.history.pop()))
+
+    def place(self, m, week, day, kvarter):
+        before = self.conflicts_of(m)
+        self.discard(m)
+        self.week[m], self.day[m], self.kvarter[m] = week, day, kvarter
+        self.add(m)
+        delta = self.conflicts_of(m) - before
+        self.conflicts += delta
+        return delta
+
+    def feasible(self):
+        return self.conflicts == 0
@@ -1,81 +1,339 @@
+import copy
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
 import pandas as pd
 from collections import defaultdict
-from datetime import datetime, date
+from datetime import time
+from Calendar import Calendar
 #import Meetings
 #import Personer
 
 class dataReader:
 
+    cache_format = 3   #Bumped when save_cache stores the data differently
+
     def __init__(self):
 
         self.num_meetings = None
         self.num_persons = None
-        self.meetings = []
-        self.persons = []
+        self._meetings = None
+        self._persons = None
+
+        #Calendar used for the occupancy grid when no other is asked for, same default as Solver
+        self.calendar = Calendar()
+        self.occupancy = None
+        self.occupancy_key = None
+        self.occupancy_calendar = None
+        self.cache_folder = None   #Set when the data is stored in or loaded from a cache
+        self.version = 0           #Counts the edits made with apply_changes
+
+
+
+    @property
+    def meetings(self):
+        #Rows of m_data, only built when used
+        if self._meetings is None:
+            self._meetings = [self.m_data.iloc[i] for i in range(self.num_meetings)]
+        return self._meetings
+
+    @property
+    def persons(self):
+        #Rows of p_data, only built when used
+        if self._persons is None:
+            self._persons = [self.p_data.iloc[i] for i in range(self.num_persons)]
+        return self._persons
+
+    def read_data(self, filename, cache_dir=None):
+        #With a cache_dir the normalized data is stored there after the first read, and later reads of the same
+        #unchanged files load it from there instead of parsing the Excel files
+        if cache_dir is not None:
+            folder = os.path.join(cache_dir, self.cache_key(filename))
+            if os.path.exists(os.path.join(folder, 'meta.json')):
+                self.load_cache(folder)
+                return
+
+        m_data = pd.read_excel(filename[0])
+        p_data = pd.read_excel(filename[1])
+        u_data = pd.read_excel(filename[2],usecols="A:E", converters= {'B:E': pd.to_datetime})
+        self.load_frames(m_data, p_data, u_data)
+
+        if cache_dir is not None:
+            self.save_cache(folder)
+
+    def load_frames(self, m_data, p_data, u_data):
+        #Normalize the meeting, person and unavailability sheets. Used by read_data and for data that is not read from Excel
+        self.m_data = self.normalize_meetings(m_data)
+        self.p_data = p_data.copy()
+        self.u_data = self.normalize_unavailability(u_data)
+
+        self.set_meeting_tables()
+
+        self.build_occupancy()
 
+    def normalize_meetings(self, m_data):
+        #Meeting sheet with one row per meeting, a recurring meeting is repeated num_meetings times
+        m_data = m_data.copy()
+        m_data.participants = m_data.participants.str.replace(' ','')
+        m_data['num_meetings'] = pd.to_numeric(m_data['num_meetings'].fillna(1), downcast='unsigned')
+        m_data['ID'] = pd.to_numeric(m_data['ID'], downcast='unsigned')
+        return m_data.loc[m_data.index.repeat(m_data.num_meetings)].reset_index(drop=True)
 
+    def normalize_unavailability(self, u_data):
+        u_data = u_data.copy()
+        #Times typed as text in Excel are read as strings
+        for c in ('Start tid', 'End tid'):
+            u_data[c] = [v if isinstance(v, time) else pd.Timestamp(str(v)).time() for v in u_data[c]]
 
-    def read_data(self, filename):
-        self.m_data = pd.read_excel(filename[0])
-        self.m_data.participants = self.m_data.participants.str.replace(' ','')
-        self.m_data['num_meetings'] = pd.to_numeric(self.m_data['num_meetings'].fillna(1), downcast='unsigned')
-        self.m_data['ID'] = pd.to_numeric(self.m_data['ID'], downcast='unsigned')
+        #Busy periods as absolute start and end times, so they can be placed in any calendar, see Calendar.busy_quarters
+        for c in ('Start', 'End'):
+            seconds = [v.hour*3600 + v.minute*60 + v.second for v in u_data[f'{c} tid']]
+            u_data[c] = pd.to_datetime(u_data[f'{c} dato']).dt.normalize() + pd.to_timedelta(seconds, unit='s')
 
+        return u_data[['Initialer', 'Start', 'End']].reset_index(drop=True)
 
-        self.p_data = pd.read_excel(filename[1])
-        self.u_data = pd.read_excel(filename[2],usecols="A:E", converters= {'B:E': pd.to_datetime})
+    def apply_changes(self, add_meetings=None, remove_ids=(), add_unavailability=None):
+        #Edit the loaded data without reading it again. add_meetings and add_unavailability are sheets in the Excel
+        #layout, a meeting with an ID that is already loaded replaces it. Only the occupancy bits of the new
+        #unavailability are set, so see Solver.replan to repair a plan after the edit
+        remove_ids = set(remove_ids)
+        if add_meetings is not None:
+            add_meetings = self.normalize_meetings(add_meetings)
+            remove_ids |= set(add_meetings.ID)
+        m_data = self.m_data[~self.m_data.ID.isin(remove_ids)]
+        if add_meetings is not None:
+            m_data = pd.concat([m_data, add_meetings], ignore_index=True)
+        self.m_data = m_data.reset_index(drop=True)
+        self.set_meeting_tables()
 
+        new_persons = set(p for parts in self.m_data.participants for p in parts.split(','))
+        if add_unavailability is not None:
+            add_unavailability = self.normalize_unavailability(add_unavailability)
+            self.u_data = pd.concat([self.u_data, add_unavailability], ignore_index=True)
+            new_persons |= set(add_unavailability.Initialer)
 
-        self.m_data = self.m_data.loc[self.m_data.index.repeat(self.m_data.num_meetings)].reset_index(drop=True)
+        if self.occupancy is not None:
+            self.update_occupancy(new_persons - set(self.person_row), add_unavailability)
+        self.version += 1
 
+    def select_meetings(self, ids):
+        #Copy of the data reader with only the meetings with the given IDs, in the same order. Persons, unavailability and
+        #occupancy are shared with this one, not copied. Used to plan groups of meetings on their own, see Solver.solve_components
+        part = copy.copy(self)
+        part.m_data = self.m_data[self.m_data.ID.isin(ids)].reset_index(drop=True)
+        part.set_meeting_tables()
+        part.cache_folder = None   #The cache holds all the meetings
+        return part
+
+    def overlay(self, add_meetings=None, remove_ids=(), add_unavailability=None):
+        #Copy of the data reader with the edits of apply_changes made to the copy only, e.g. for what-if scenarios.
+        #The data the edits do not touch is shared with this one
+        part = copy.copy(self)
+        part.busy_intervals = dict(self.busy_intervals)   #apply_changes updates it in place
+        part.cache_folder = None   #The cache holds the data without the edits
+        part.apply_changes(add_meetings, remove_ids, add_unavailability)
+        return part
+
+    def set_meeting_tables(self):
+        #Lookups built from the expanded meetings: week distance per recurring meeting ID, and the counts
         self.unique_meetings = self.m_data[['ID', 'days_between']].drop_duplicates(subset='ID').reset_index(drop=True)
         self.unique_dict = defaultdict(list)
 
-        for _, row in self.unique_meetings.iterrows():
-            vals = row.tolist()
-            self.unique_dict[int(vals[0])].append(vals[1] // 7)
+        for ID, days_between in zip(self.unique_meetings.ID.tolist(), self.unique_meetings.days_between.tolist()):
+            self.unique_dict[int(ID)].append(days_between // 7)
         self.unique_dict = dict(self.unique_dict)
-        #print(self.unique_dict)
-
 
         self.num_meetings = len(self.m_data.index)
         self.num_persons = len(self.p_data.index)
+        self._meetings = None
+        self._persons = None
+
+    def cache_key(self, filename):
+        #Key of the cache for the given input files, changes when a file is modified or the cache layout changes
+        h = hashlib.sha1()
+        h.update(f"format {self.cache_format};".encode())
+        for f in filename:
+            stat = os.stat(f)
+            h.update(f"{os.path.abspath(f)}|{stat.st_size}|{stat.st_mtime_ns};".encode())
+        return h.hexdigest()
+
+    def save_cache(self, folder):
+        #Store the normalized data column by column as .npy files. Text is stored as codes into one string table,
+        #times as seconds after midnight, so everything loads without pickle and the arrays can be memory mapped
+        tmp = folder + '.tmp'
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        strings = dict()
+        meta = {'frames': dict(), 'occupancy_key': list(self.occupancy_key)}
+
+        def codes(values):
+            return np.array([-1 if v is None or (isinstance(v, float) and np.isnan(v)) else strings.setdefault(str(v), len(strings)) for v in values], dtype=np.int32)
+
+        for name in ('m_data', 'p_data', 'u_data'):
+            frame = getattr(self, name)
+            columns = []
+            for i, c in enumerate(frame.columns):
+                col = frame[c]
+                if pd.api.types.is_datetime64_any_dtype(col):
+                    kind, values = 'datetime', col.values.astype('datetime64[ns]').astype(np.int64)
+                elif pd.api.types.is_numeric_dtype(col) and not pd.api.types.is_bool_dtype(col):
+                    if pd.api.types.is_integer_dtype(col) and not col.isna().any():
+                        kind, values = 'int', col.to_numpy(dtype=np.int64)
+                    else:
+                        kind, values = 'float', col.to_numpy(dtype=np.float64, na_value=np.nan)
+                elif col.map(lambda v: isinstance(v, time)).any():
+                    kind, values = 'time', np.array([v.hour*3600 + v.minute*60 + v.second if isinstance(v, time) else -1 for v in col], dtype=np.int32)
+                else:
+                    kind, values = 'str', codes(col.tolist())
+                np.save(os.path.join(tmp, f'{name}.{i}.npy'), values)
+                columns.append([str(c), kind, str(col.dtype)])
+            meta['frames'][name] = columns
+
+        np.save(os.path.join(tmp, 'occupancy.npy'), self.occupancy)
+        np.save(os.path.join(tmp, 'occupancy_persons.npy'), codes(self.occupancy_persons))
+        intervals = [self.busy_intervals[p] for p in self.occupancy_persons]
+        np.save(os.path.join(tmp, 'busy_ptr.npy'), np.cumsum([0] + [len(i) for i in intervals]))
+        np.save(os.path.join(tmp, 'busy_intervals.npy'), np.concatenate(intervals).astype(np.int64) if intervals else np.zeros((0, 2), dtype=np.int64))
+        np.save(os.path.join(tmp, 'strings.npy'), np.array(list(strings.keys()), dtype=str))
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+        shutil.rmtree(folder, ignore_errors=True)
+        os.replace(tmp, folder)
+        self.cache_folder = folder
+
+    def load_cache(self, folder, mmap=True):
+        #Load data stored by save_cache. With mmap the occupancy arrays are memory mapped instead of read into memory
+        with open(os.path.join(folder, 'meta.json')) as f:
+            meta = json.load(f)
+        strings = np.load(os.path.join(folder, 'strings.npy'))
+        strings = np.append(strings.astype(object), np.nan)   #Code -1 is a missing value
+        mode = 'r' if mmap else None
+
+        for name, columns in meta['frames'].items():
+            frame = dict()
+            for i, (c, kind, dtype) in enumerate(columns):
+                values = np.load(os.path.join(folder, f'{name}.{i}.npy'))
+                if kind == 'datetime':
+                    values = values.astype('datetime64[ns]').astype(dtype)
+                elif kind in ('int', 'float'):
+                    values = pd.Series(values).astype(dtype)   #Back to the dtype it was read with, e.g. uint8
+                elif kind == 'time':
+                    values = np.array([time(v // 3600, v // 60 % 60, v % 60) if v >= 0 else np.nan for v in values.tolist()], dtype=object)
+                elif kind == 'str':
+                    values = strings[values]
+                frame[c] = values
+            setattr(self, name, pd.DataFrame(frame))
 
-        for i in range(self.num_meetings):
-            meeting = self.m_data.iloc[i]
-            self.meetings.append(meeting)
+        self.set_meeting_tables()
 
-        for i in range(self.num_persons):
-            person = self.p_data.iloc[i]
-            self.persons.append(person)
+        self.occupancy = np.load(os.path.join(folder, 'occupancy.npy'), mmap_mode=mode)
+        self.occupancy_key = tuple(meta['occupancy_key'])
+        self.occupancy_calendar = Calendar.from_key(self.occupancy_key)
+        self.occupancy_persons = list(strings[np.load(os.path.join(folder, 'occupancy_persons.npy'))])
+        self.person_row = {p: i for i, p in enumerate(self.occupancy_persons)}
+        ptr = np.load(os.path.join(folder, 'busy_ptr.npy'))
+        intervals = np.load(os.path.join(folder, 'busy_intervals.npy'), mmap_mode=mode)
+        self.busy_intervals = {p: intervals[ptr[i]:ptr[i+1]] for i, p in enumerate(self.occupancy_persons)}
+        self.cache_folder = folder
 
+    def build_occupancy(self, calendar=None):
+        #Unavailability as bits: one uint64 per person, week and day where bit q is set when the person is busy in quarter q
+        #after day_start. The holidays of the calendar are busy for everyone. Also builds busy_intervals, the merged busy
+        #intervals per person as absolute quarters from the start of the calendar, see Calendar.index
+        calendar = self.calendar if calendar is None else calendar
+        if calendar.quarters > 64:
+            raise ValueError(f"At most 64 quarters per day fit in the occupancy bits, got {calendar.quarters}")
 
-        #self.u_data = self.u_data.set_index(['Initialer'])
-        #unique_pers = list(self.u_data.index.unique())
+        persons = set(self.u_data.Initialer) if hasattr(self, 'u_data') else set()
+        if hasattr(self, 'p_data'):
+            persons |= set(self.p_data.Initialer.dropna())
+        if hasattr(self, 'm_data'):
+            persons |= set(p for parts in self.m_data.participants for p in parts.split(','))
+        self.occupancy_persons = sorted(persons)
+        self.person_row = {p: i for i, p in enumerate(self.occupancy_persons)}
 
+        if hasattr(self, 'u_data'):
+            rows = np.array([self.person_row[p] for p in self.u_data.Initialer], dtype=int)
+            grid = self.busy_grid(rows, self.u_data.Start.values, self.u_data.End.values, len(self.occupancy_persons), calendar)
+        else:
+            grid = self.busy_grid(np.zeros(0, dtype=int), [], [], len(self.occupancy_persons), calendar)
+        self.occupancy = self.pack_occupancy(grid, calendar)
+        self.busy_intervals = dict(zip(self.occupancy_persons, self.intervals(grid)))
 
+        self.occupancy_key = calendar.key()
+        self.occupancy_calendar = calendar
+        return self.occupancy
 
-        #Get week number and day of week for Start og Slut
-        self.u_data['Start år'] = self.u_data['Start dato'].dt.isocalendar().year
-        self.u_data['Start uge'] = self.u_data['Start dato'].dt.isocalendar().week
-        self.u_data['Start dag'] = self.u_data['Start dato'].dt.weekday + 1
+    def busy_grid(self, rows, start, end, n_rows, calendar):
+        #(n_rows, horizon) mask of the quarters where row rows[i] is busy from start[i] to end[i], plus the holidays
+        period, first, last = calendar.busy_quarters(start, end)
+        change = np.zeros((n_rows, calendar.horizon+1), dtype=np.int32)
+        np.add.at(change, (rows[period], first), 1)
+        np.add.at(change, (rows[period], last), -1)
+        grid = np.cumsum(change[:, :-1], axis=1) > 0
+        grid.reshape(n_rows, calendar.weeks, calendar.days, calendar.quarters)[:, calendar.closed] = True
+        return grid
 
-        self.u_data['End år'] = self.u_data['End dato'].dt.isocalendar().year
-        self.u_data['End uge'] = self.u_data['End dato'].dt.isocalendar().week
-        self.u_data['End dag'] = self.u_data['End dato'].dt.weekday + 1
+    def pack_occupancy(self, grid, calendar):
+        #Occupancy bits of a (rows, horizon) busy mask, shape (rows, weeks, days)
+        packed = np.packbits(grid.reshape(len(grid), calendar.weeks, calendar.days, calendar.quarters), axis=3, bitorder='little')
+        words = np.zeros(packed.shape[:3] + (8,), dtype=np.uint8)
+        words[..., :packed.shape[3]] = packed
+        return words.view('<u8')[..., 0].astype(np.uint64)
 
-        #Slet dato
-        self.u_data = self.u_data.drop(columns=['Start dato', 'End dato'])
+    def unpack_occupancy(self, occupancy, calendar):
+        #(rows, weeks, days, quarters) busy mask of occupancy bits
+        occupancy = np.ascontiguousarray(occupancy, dtype='<u8')
+        return np.unpackbits(occupancy[..., None].view(np.uint8), axis=-1, bitorder='little')[..., :calendar.quarters].astype(bool)
 
-        #Flyt så vi har tiden til sidst
-        self.u_data = self.u_data[['Initialer', 'Start år', 'Start uge', 'Start dag', 'Start tid', 'End år', 'End uge', 'End dag', 'End tid']]
+    def intervals(self, grid):
+        #Merged busy intervals of every row of a (rows, horizon) busy mask, as (start, end) quarters
+        flat = np.zeros((len(grid), grid[0].size + 2 if len(grid) > 0 else 2), dtype=np.int8)
+        flat[:, 1:-1] = grid.reshape(len(grid), -1)
+        row, edge = np.nonzero(np.diff(flat, axis=1))
+        return np.split(edge.reshape(-1, 2), np.searchsorted(row[::2], np.arange(1, len(grid))))
 
-        d = defaultdict(list)
+    def update_occupancy(self, new_persons, u_data):
+        #Add rows for new persons and set the bits of the new busy periods in u_data, a normalized unavailability frame or None.
+        #busy_intervals is only rebuilt for the persons that got new busy periods
+        calendar = self.occupancy_calendar
+        occupancy = np.array(self.occupancy)   #A memory mapped cache is read only
+        if new_persons:
+            self.occupancy_persons = list(self.occupancy_persons) + sorted(new_persons)
+            self.person_row = {p: i for i, p in enumerate(self.occupancy_persons)}
+            holidays = self.busy_grid(np.zeros(0, dtype=int), [], [], len(new_persons), calendar)
+            occupancy = np.concatenate((occupancy, self.pack_occupancy(holidays, calendar)))
+            for p in new_persons:
+                self.busy_intervals[p] = self.intervals(holidays[:1])[0]
 
-        for _, row in self.u_data.iterrows():
-            vals = row.tolist()
-            d[vals[0]].append([tuple(vals[1:5]),tuple(vals[5:])])
+        if u_data is not None and len(u_data) > 0:
+            persons = sorted(set(u_data.Initialer))
+            local = {p: i for i, p in enumerate(persons)}
+            rows = np.array([self.person_row[p] for p in persons], dtype=int)
+            grid = self.busy_grid(np.array([local[p] for p in u_data.Initialer], dtype=int), u_data.Start.values, u_data.End.values, len(persons), calendar)
+            grid |= self.unpack_occupancy(occupancy[rows], calendar).reshape(len(persons), -1)
+            occupancy[rows] = self.pack_occupancy(grid, calendar)
+            self.busy_intervals.update(zip(persons, self.intervals(grid)))
+        self.occupancy = occupancy
 
-        self.time_dict = dict(d)
+    def get_occupancy(self, calendar):
+        #Occupancy for the given calendar, only rebuilt when the calendar changes
+        if self.occupancy is None or self.occupancy_key != calendar.key():
+            self.build_occupancy(calendar)
+        return self.occupancy
 
+    def is_free(self, pers, week, day, kvarter, length=1):
+        #O(1) lookup: is the person free for length quarters from kvarter. week and day are 1-indexed
+        if pers not in self.person_row:
+            return True
+        mask = ((1 << length) - 1) << kvarter
+        return int(self.occupancy[self.person_row[pers], week-1, day-1]) & mask == 0
 
+    def free_slots(self, persons):
+        #Bits of the quarters where all the persons are free, shape (weeks, days)
+        rows = [self.person_row[p] for p in persons if p in self.person_row]
+        busy = np.bitwise_or.reduce(self.occupancy[rows], axis=0) if rows else np.zeros(self.occupancy.shape[1:], dtype=np.uint64)
+        return ~busy & np.uint64((1 << self.occupancy_calendar.quarters) - 1)